@@ -1,15 +1,30 @@
+import argparse
 import pygame
-import random
 import sys
 
-# Initialize pygame
-pygame.init()
+from GuessHighLow_engine import CARDS, DECK_SIZE, GameEngine, ScaledClock
+from GuessHighLow_render import CardAtlas, FrameProfiler, HitGrid, ResourcePool, TextCache, load_fonts
 
 # Screen settings
 SCREEN_WIDTH = 600
 SCREEN_HEIGHT = 800
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Guess High Low")
+screen = None  # Opened on first draw by open_display(), or an offscreen Surface
+
+def open_display():
+    """Initialize only the display subsystem and open the window, once"""
+    global screen
+    if screen is None:
+        pygame.display.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Guess High Low")
+    return screen
+
+def open_offscreen():
+    """Draw into a plain Surface instead of a window, for frame export"""
+    global screen
+    if screen is None:
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return screen
 
 # Color definitions
 BACKGROUND_COLOR = (50, 120, 80)   # Green background
@@ -19,53 +34,119 @@ BUTTON_COLOR = (200, 200, 200)     # Button color
 TEXT_COLOR = (0, 0, 0)             # Text color
 BORDER_COLOR = (0, 0, 0)           # Border color
 
-# Card class
-class Card:
-    def __init__(self, card_id, name, value, suit=None):
-        self.card_id = card_id
-        self.name = name
-        self.value = value
-        self.suit = suit
-        self.is_revealed = False
-        
-    def __str__(self):
-        if self.suit:
-            return f"{self.suit}{self.name}"
+CARD_SIZE = (120, 180)
+FONT_SIZES = {"small": 24, "medium": 32, "large": 48}
+
+# Screen regions tracked by dirty-rectangle rendering
+COMPUTER_CARD_RECT = pygame.Rect(SCREEN_WIDTH//2 - 60, 100, 120, 180)
+PLAYER_CARD_RECT = pygame.Rect(SCREEN_WIDTH//2 - 60, 400, 120, 180)
+SCORE_RECT = pygame.Rect(20, 20, 200, 30)
+CONFETTI_RECT = pygame.Rect(95, 95, SCREEN_WIDTH - 190, 410)  # Also holds the game over text
+ACTION_BUTTONS_RECT = pygame.Rect(50, 250, 150, 250)
+GUESS_BUTTONS_RECT = pygame.Rect(SCREEN_WIDTH - 200, 250, 150, 250)
+RESULT_RECT = pygame.Rect(50, 250, 400, 100)
+INSTRUCTION_DIALOG_RECT = pygame.Rect(50, 50, 500, 600)
+HINT_DIALOG_RECT = pygame.Rect(50, 100, 500, 480)
+SHUFFLE_DIALOG_RECT = pygame.Rect(50, 100, 500, 500)  # Increased height
+
+# Main loop settings
+FRAME_RATE = 60             # Fixed loop, and event loop while animating
+IDLE_TIMEOUT = 1000         # Event loop wakes up at least once a second
+TIMER_EVENT = pygame.USEREVENT + 1
+PROFILER_KEY = pygame.K_F3  # Toggles the frame-time overlay
+
+def render_card(surface, card, card_rect):
+    """Render a card definition's face, or the card back when card is None"""
+    if card:
+        # Draw card front
+        pygame.draw.rect(surface, CARD_FRONT_COLOR, card_rect)
+        pygame.draw.rect(surface, BORDER_COLOR, card_rect, 2)
+        
+        # Draw card info
+        fonts = RESOURCES["fonts"]
+        text_cache = RESOURCES["text_cache"]
+        if card.suit:
+            suit_text = text_cache.render(fonts["medium"], card.suit, True, TEXT_COLOR)
+            name_text = text_cache.render(fonts["medium"], card.name, True, TEXT_COLOR)
         else:
-            return self.name
+            name_text = text_cache.render(fonts["small"], card.name, True, TEXT_COLOR)
+            
+        suit_pos = (card_rect.x + 10, card_rect.y + 10)
+        name_pos = (card_rect.centerx - name_text.get_width()//2, 
+                   card_rect.centery - name_text.get_height()//2)
+        
+        if card.suit:
+            surface.blit(suit_text, suit_pos)
+        surface.blit(name_text, name_pos)
+    else:
+        # Draw card back
+        pygame.draw.rect(surface, CARD_BACK_COLOR, card_rect)
+        pygame.draw.rect(surface, BORDER_COLOR, card_rect, 2)
+
+# Fonts, rendered text and card sprites shared by every game instance, loaded on first use
+RESOURCES = ResourcePool()
+RESOURCES.register("fonts", lambda: load_fonts(FONT_SIZES))
+RESOURCES.register("text_cache", TextCache)
+RESOURCES.register("card_atlas", lambda: CardAtlas(CARD_SIZE, 55, render_card))  # 54 faces + back
 
 # Game class
-class PokerGame:
-    def __init__(self):
-        self.deck = []
-        self.card_deck = []
-        self.card_dealed = []
-        self.card_revealed = []
-        self.previous_deck_order = []  # Save pre-shuffle order
-        
-        self.player_score = 0
-        self.computer_card = None
-        self.player_card = None
-        self.game_state = "idle"  # idle, dealing, waiting_guess, revealing, game_over
-        self.deal_start_time = 0
-        self.result_start_time = 0
-        
-        self.show_hint_dialog = False
-        self.hint_probabilities = {}
-        self.show_result = False
-        self.result_info = {}
-        self.show_shuffle_dialog = False
-        self.shuffle_info = {}
-        self.show_instruction_dialog = False  # New instruction dialog flag
-        
-        self.fonts = {
-            "small": pygame.font.Font(None, 24),
-            "medium": pygame.font.Font(None, 32),
-            "large": pygame.font.Font(None, 48)
-        }
+class PokerGame(GameEngine):
+    def __init__(self, dirty_rendering=False, decks=1, clock=None):
+        self.text_cache = RESOURCES["text_cache"]  # Rendered text surfaces reused across frames
+        self.card_atlas = RESOURCES["card_atlas"]
+        
+        # Dirty-rectangle rendering: only changed regions are pushed to the display
+        self.dirty_rendering = dirty_rendering
+        self.last_region_keys = None # Region keys of the last frame, None forces a full flip
+        self.confetti = ()           # (color, position) of the confetti in this frame
+        self.scheduled_timer = None  # (name, due) last armed with pygame.time.set_timer
+        self.hint_best = None        # Solver's best guess for the open hint dialog
+        self.hint_values = {}        # Solver's expected score per guess, small shoes only
+        self.leaderboard = None      # Optional Leaderboard, final scores are submitted to it
+        self.player_name = None      # Name submitted with final scores, set with the leaderboard
+        self.leaderboard_rank = None # Future of (rank, total games) for the finished game
         
         self.buttons = self.create_buttons()
-        self.initialize_deck()
+        self.hit_grid = HitGrid(self.buttons)
+        super().__init__(decks=decks, clock=clock)
+        self.effects_rng = None  # Confetti stream, spawned on the first game over
+        
+    @property
+    def fonts(self):
+        """Shared fonts, loaded on first draw"""
+        return RESOURCES["fonts"]
+        
+    def is_animating(self):
+        """True while something on screen moves without input"""
+        return self.game_state == "game_over"  # Confetti
+        
+    def schedule_timer(self):
+        """Arm a one-shot timer event for the engine's next timed transition
+
+        Only a change of the pending transition arms a timer: one that fired
+        without moving the game on is not re-armed, so the loop sleeps.
+        """
+        pending = self.pending_timer()
+        if pending == self.scheduled_timer:
+            return
+        self.scheduled_timer = pending
+        if pending:
+            name, due = pending
+            event = pygame.event.Event(TIMER_EVENT, timer=name)
+            pygame.time.set_timer(event, max(1, round(self.clock.real_ms(due - self.now()))), loops=1)
+        else:
+            pygame.time.set_timer(TIMER_EVENT, 0)
+        
+    def start_new_game(self, seed=None):
+        """Start new game"""
+        super().start_new_game(seed)
+        self.leaderboard_rank = None
+        
+    def finish_round(self):
+        """Finish the round, submitting the final score when the game ends"""
+        super().finish_round()
+        if self.game_state == "game_over" and self.leaderboard is not None and self.leaderboard_rank is None:
+            self.leaderboard_rank = self.leaderboard.submit(self.player_name, self.player_score, self.bonus_count)
         
     def create_buttons(self):
         """Create all buttons"""
@@ -93,198 +174,13 @@ class PokerGame:
         
         return buttons
     
-    def initialize_deck(self):
-        """Initialize 54 cards"""
-        self.deck = []
-        self.card_deck = []
-        self.card_dealed = []
-        self.card_revealed = []
-        self.previous_deck_order = []
-        
-        # Card values mapping
-        values = {
-            '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-            '9': 9, '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
-        }
-        
-        suits = ["Spade", "Heart", "Diamond", "Club"]
-        suit_signs = ["♠", "♥", "♦", "♣"]
-        
-        # Create standard cards
-        for suit, sign in zip(suits, suit_signs):
-            for name, value in values.items():
-                card_id = f"{suit}_{name}"
-                card = Card(card_id, name, value, sign)
-                self.deck.append(card)
-        
-        # Create jokers
-        little_joker = Card("little_joker", "Little Joker", 15)
-        big_joker = Card("big_joker", "Big Joker", 16)
-        
-        self.deck.extend([little_joker, big_joker])
-        self.card_deck = self.deck.copy()
-        self.previous_deck_order = self.card_deck.copy()
-        
-    def shuffle_deck(self):
-        """Shuffle deck and save pre-shuffle order"""
-        if self.card_deck:
-            self.previous_deck_order = self.card_deck.copy()
-            random.shuffle(self.card_deck)
-            
-            # Prepare shuffle dialog info
-            self.shuffle_info = {
-                "previous_order": self.previous_deck_order[:10],  # Show first 10 cards
-                "current_order": self.card_deck[:10],            # Show first 10 cards
-                "total_cards": len(self.card_deck)
-            }
-            self.show_shuffle_dialog = True
-        
-    def deal_cards(self, count):
-        """Deal specified number of cards"""
-        if len(self.card_deck) < count:
-            return None
-            
-        dealt_cards = []
-        for _ in range(count):
-            card = self.card_deck.pop(0)
-            self.card_dealed.append(card)
-            dealt_cards.append(card)
-            
-        return dealt_cards
-    
-    def reveal_card(self, card):
-        """Reveal specified card"""
-        if card in self.card_dealed:
-            card.is_revealed = True
-            self.card_dealed.remove(card)
-            self.card_revealed.append(card)
-    
-    def start_new_game(self):
-        """Start new game"""
-        self.initialize_deck()
-        self.shuffle_deck()
-        self.player_score = 0
-        self.computer_card = None
-        self.player_card = None
-        self.game_state = "idle"
-        self.next_round()
-        
-    def next_round(self):
-        """Go to next round"""
-        if len(self.card_deck) >= 2:
-            # Deal two cards
-            dealt_cards = self.deal_cards(2)
-            if dealt_cards:
-                self.computer_card = dealt_cards[0]
-                self.player_card = dealt_cards[1]
-                
-                # Reset card states
-                self.computer_card.is_revealed = False
-                self.player_card.is_revealed = False
-                
-                self.game_state = "dealing"
-                self.deal_start_time = pygame.time.get_ticks()
-                # print(f"Dealt cards: Computer={self.computer_card}, Player={self.player_card}")  # Debug
-        else:
-            self.game_state = "game_over"
-    
-    def calculate_probabilities(self):
-        """Calculate probabilities for different guesses"""
-        if not self.computer_card or not self.player_card:
-            return {"higher": 0, "lower": 0, "tie": 0, "remaining": 0}
-            
-        computer_value = self.computer_card.value
-        total_cards = len(self.card_deck) + 1  # +1 for player's unrevealed card
-        higher_count = 0
-        lower_count = 0
-        tie_count = 0
-        
-        # Calculate probabilities from remaining deck and player's card
-        all_unrevealed = self.card_deck + [self.player_card]
-        
-        for card in all_unrevealed:
-            if card.value > computer_value:
-                higher_count += 1
-            elif card.value < computer_value:
-                lower_count += 1
-            else:
-                tie_count += 1
-        
-        return {
-            "higher": higher_count / total_cards if total_cards > 0 else 0,
-            "lower": lower_count / total_cards if total_cards > 0 else 0,
-            "tie": tie_count / total_cards if total_cards > 0 else 0,
-            "remaining": total_cards
-        }
-    
-    def check_guess(self, player_guess):
-        """Check player's guess and calculate score"""
-        if not self.computer_card or not self.player_card:
-            return False, 0, False
-            
-        # Reveal player card
-        self.reveal_card(self.player_card)
-        
-        computer_value = self.computer_card.value
-        player_value = self.player_card.value
-        
-        # Determine if guess is correct
-        is_correct = False
-        if player_guess == "higher" and player_value > computer_value:
-            is_correct = True
-        elif player_guess == "lower" and player_value < computer_value:
-            is_correct = True
-        elif player_guess == "tie" and player_value == computer_value:
-            is_correct = True
-        
-        # Calculate score
-        score_added = 0
-        bonus = False
-        
-        if is_correct:
-            # Calculate probability of this guess
-            probabilities = self.calculate_probabilities()
-            guess_probability = probabilities.get(player_guess, 0)
-            
-            if guess_probability < 0.1:  # Less than 10% probability
-                score_added = 100
-                bonus = True
-            else:
-                score_added = 10
-                bonus = False
-                
-            self.player_score += score_added
-        
-        return is_correct, score_added, bonus
-    
     def draw_card(self, card, position):
-        """Draw a card"""
-        card_size = (120, 180)
-        card_rect = pygame.Rect(position, card_size)
-        
-        if card.is_revealed:
-            # Draw card front
-            pygame.draw.rect(screen, CARD_FRONT_COLOR, card_rect)
-            pygame.draw.rect(screen, BORDER_COLOR, card_rect, 2)
-            
-            # Draw card info
-            if card.suit:
-                suit_text = self.fonts["medium"].render(card.suit, True, TEXT_COLOR)
-                name_text = self.fonts["medium"].render(card.name, True, TEXT_COLOR)
-            else:
-                name_text = self.fonts["small"].render(card.name, True, TEXT_COLOR)
-                
-            suit_pos = (position[0] + 10, position[1] + 10)
-            name_pos = (position[0] + card_size[0]//2 - name_text.get_width()//2, 
-                       position[1] + card_size[1]//2 - name_text.get_height()//2)
-            
-            if card.suit:
-                screen.blit(suit_text, suit_pos)
-            screen.blit(name_text, name_pos)
+        """Draw a card from the sprite atlas"""
+        if self.is_revealed(card):
+            face = card % DECK_SIZE  # Same face in every deck of the shoe
+            self.card_atlas.blit(screen, face, CARDS[face], position)
         else:
-            # Draw card back
-            pygame.draw.rect(screen, CARD_BACK_COLOR, card_rect)
-            pygame.draw.rect(screen, BORDER_COLOR, card_rect, 2)
+            self.card_atlas.blit(screen, "back", None, position)
     
     def draw_button(self, button_name, text):
         """Draw a single button"""
@@ -293,7 +189,7 @@ class PokerGame:
             pygame.draw.rect(screen, BUTTON_COLOR, button_rect)
             pygame.draw.rect(screen, BORDER_COLOR, button_rect, 2)
             
-            text_surface = self.fonts["small"].render(text, True, TEXT_COLOR)
+            text_surface = self.text_cache.render(self.fonts["small"], text, True, TEXT_COLOR)
             text_pos = (button_rect.centerx - text_surface.get_width()//2,
                        button_rect.centery - text_surface.get_height()//2)
             screen.blit(text_surface, text_pos)
@@ -321,12 +217,12 @@ class PokerGame:
     def draw_instruction_dialog(self):
         """Draw instruction dialog"""
         # Draw dialog background
-        dialog_rect = pygame.Rect(50, 50, 500, 600)
+        dialog_rect = INSTRUCTION_DIALOG_RECT
         pygame.draw.rect(screen, (240, 240, 240), dialog_rect)
         pygame.draw.rect(screen, BORDER_COLOR, dialog_rect, 3)
         
         # Draw title
-        title = self.fonts["medium"].render("Game Instructions", True, TEXT_COLOR)
+        title = self.text_cache.render(self.fonts["medium"], "Game Instructions", True, TEXT_COLOR)
         screen.blit(title, (dialog_rect.centerx - title.get_width()//2, dialog_rect.y + 20))
         
         # Instruction text lines
@@ -349,7 +245,7 @@ class PokerGame:
         # Draw instruction text
         y_offset = 60
         for line in instructions:
-            text_surface = self.fonts["small"].render(line, True, TEXT_COLOR)
+            text_surface = self.text_cache.render(self.fonts["small"], line, True, TEXT_COLOR)
             screen.blit(text_surface, (dialog_rect.x + 20, dialog_rect.y + y_offset))
             y_offset += 25
         
@@ -359,12 +255,12 @@ class PokerGame:
     def draw_hint_dialog(self):
         """Draw hint dialog"""
         # Draw dialog background
-        dialog_rect = pygame.Rect(50, 100, 500, 480)
+        dialog_rect = HINT_DIALOG_RECT
         pygame.draw.rect(screen, (240, 240, 240), dialog_rect)
         pygame.draw.rect(screen, BORDER_COLOR, dialog_rect, 3)
         
         # Draw title
-        title = self.fonts["medium"].render("Hint - Probabilities", True, TEXT_COLOR)
+        title = self.text_cache.render(self.fonts["medium"], "Hint - Probabilities", True, TEXT_COLOR)
         screen.blit(title, (dialog_rect.x + 20, dialog_rect.y + 20))
         
         # Draw probabilities
@@ -372,40 +268,50 @@ class PokerGame:
         for guess_type in ["higher", "lower", "tie"]:
             prob = self.hint_probabilities.get(guess_type, 0)
             prob_text = f"{guess_type.capitalize()}: {prob:.1%}"
-            text_surface = self.fonts["small"].render(prob_text, True, TEXT_COLOR)
+            text_surface = self.text_cache.render(self.fonts["small"], prob_text, True, TEXT_COLOR)
             screen.blit(text_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset))
             y_offset += 30
         
         # Draw remaining cards
         remaining = self.hint_probabilities.get("remaining", 0)
         rem_text = f"Remaining cards: {remaining}"
-        text_surface = self.fonts["small"].render(rem_text, True, TEXT_COLOR)
+        text_surface = self.text_cache.render(self.fonts["small"], rem_text, True, TEXT_COLOR)
         screen.blit(text_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset + 20))
         
+        # Draw optimal guess from the solver
+        if self.hint_best:
+            best_text = f"Best guess: {self.hint_best.capitalize()}"
+            text_surface = self.text_cache.render(self.fonts["medium"], best_text, True, TEXT_COLOR)
+            screen.blit(text_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset + 70))
+        if self.hint_values:
+            ev_text = f"Expected points to game end: {self.hint_values[self.hint_best]:.1f}"
+            text_surface = self.text_cache.render(self.fonts["small"], ev_text, True, TEXT_COLOR)
+            screen.blit(text_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset + 110))
+        
         # Draw OK button
         self.draw_button("hint_ok", "OK")
     
     def draw_shuffle_dialog(self):
         """Draw shuffle dialog"""
         # Draw dialog background
-        dialog_rect = pygame.Rect(50, 100, 500, 500)  # Increased height
+        dialog_rect = SHUFFLE_DIALOG_RECT
         pygame.draw.rect(screen, (240, 240, 240), dialog_rect)
         pygame.draw.rect(screen, BORDER_COLOR, dialog_rect, 3)
         
         # Draw title
-        title = self.fonts["medium"].render("Deck Shuffled", True, TEXT_COLOR)
+        title = self.text_cache.render(self.fonts["medium"], "Deck Shuffled", True, TEXT_COLOR)
         screen.blit(title, (dialog_rect.centerx - title.get_width()//2, dialog_rect.y + 20))
         
         # Show total cards
         total_text = f"Shuffled. Remaining cards in deck: {self.shuffle_info['total_cards']}"
-        total_surface = self.fonts["small"].render(total_text, True, TEXT_COLOR)
+        total_surface = self.text_cache.render(self.fonts["small"], total_text, True, TEXT_COLOR)
         screen.blit(total_surface, (dialog_rect.x + 20, dialog_rect.y + 60))
         
         # Show first 10 cards changes
         y_offset = 100
         '''       
         # Before shuffle title
-        before_title = self.fonts["small"].render("Before Shuffle (First 10 cards):", True, (100, 100, 100))
+        before_title = self.text_cache.render(self.fonts["small"], "Before Shuffle (First 10 cards):", True, (100, 100, 100))
         screen.blit(before_title, (dialog_rect.x + 20, dialog_rect.y + y_offset))
         y_offset += 30
         
@@ -414,19 +320,19 @@ class PokerGame:
         for i, card in enumerate(self.shuffle_info["previous_order"]):
             if i > 0:
                 prev_cards_text += ", "
-            prev_cards_text += card.card_id     # card.card_id instead of str(card)
+            prev_cards_text += CARDS[card % DECK_SIZE].card_id     # card_id instead of the display name
         
         # Split long text for display
         prev_lines = self.split_text(prev_cards_text, 45)
         for line in prev_lines:
-            prev_surface = self.fonts["small"].render(line, True, TEXT_COLOR)
+            prev_surface = self.text_cache.render(self.fonts["small"], line, True, TEXT_COLOR)
             screen.blit(prev_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset))
             y_offset += 25
         
         y_offset += 10
         
         # After shuffle title
-        after_title = self.fonts["small"].render("After Shuffle (First 10 cards):", True, (100, 100, 100))
+        after_title = self.text_cache.render(self.fonts["small"], "After Shuffle (First 10 cards):", True, (100, 100, 100))
         screen.blit(after_title, (dialog_rect.x + 20, dialog_rect.y + y_offset))
         y_offset += 30
         
@@ -435,12 +341,12 @@ class PokerGame:
         for i, card in enumerate(self.shuffle_info["current_order"]):
             if i > 0:
                 current_cards_text += ", "
-            current_cards_text += card.card_id      # card.card_id instead of str(card)
+            current_cards_text += CARDS[card % DECK_SIZE].card_id      # card_id instead of the display name
        
         # Split long text for display
         current_lines = self.split_text(current_cards_text, 45)
         for line in current_lines:
-            current_surface = self.fonts["small"].render(line, True, TEXT_COLOR)
+            current_surface = self.text_cache.render(self.fonts["small"], line, True, TEXT_COLOR)
             screen.blit(current_surface, (dialog_rect.x + 30, dialog_rect.y + y_offset))
             y_offset += 25
         '''         
@@ -472,7 +378,7 @@ class PokerGame:
         bonus = self.result_info.get("bonus", False)
         
         # Draw message background
-        msg_rect = pygame.Rect(50, 250, 400, 100)
+        msg_rect = RESULT_RECT
         pygame.draw.rect(screen, (240, 240, 240), msg_rect)
         pygame.draw.rect(screen, BORDER_COLOR, msg_rect, 3)
         
@@ -488,7 +394,7 @@ class PokerGame:
             result_text = "Missed. +0 Points"
             color = (200, 0, 0)  # Red
             
-        text_surface = self.fonts["medium"].render(result_text, True, color)
+        text_surface = self.text_cache.render(self.fonts["medium"], result_text, True, color)
         screen.blit(text_surface, 
                    (msg_rect.centerx - text_surface.get_width()//2,
                     msg_rect.centery - text_surface.get_height()//2))
@@ -496,37 +402,54 @@ class PokerGame:
     def draw_game_over(self):
         """Draw game over screen"""
         # Draw congratulations message
-        congrats_text = self.fonts["large"].render("Congratulations!", True, (255, 215, 0))
-        score_text = self.fonts["medium"].render(f"Final Score: {self.player_score}", True, TEXT_COLOR)
+        congrats_text = self.text_cache.render(self.fonts["large"], "Congratulations!", True, (255, 215, 0))
+        score_text = self.text_cache.render(self.fonts["medium"], f"Final Score: {self.player_score}", True, TEXT_COLOR)
         
         screen.blit(congrats_text, 
                    (SCREEN_WIDTH//2 - congrats_text.get_width()//2, 300))
         screen.blit(score_text,
                    (SCREEN_WIDTH//2 - score_text.get_width()//2, 380))
         
+        # Leaderboard rank, once the background thread has it
+        future = self.leaderboard_rank
+        if future is not None and future.done() and future.exception() is None:
+            rank, total = future.result()
+            rank_text = self.text_cache.render(self.fonts["small"], f"Leaderboard rank: #{rank:,} of {total:,}",
+                                               True, TEXT_COLOR)
+            screen.blit(rank_text, (SCREEN_WIDTH//2 - rank_text.get_width()//2, 430))
+        
         # Draw simple "confetti" (colored circles)
+        for color, pos in self.confetti:
+            pygame.draw.circle(screen, color, pos, 5)
+    
+    def throw_confetti(self):
+        """Confetti of one frame, the same for every region drawn in it"""
+        if self.effects_rng is None:  # Kept apart from the shuffle streams
+            self.effects_rng = self.rng.spawn(1)[0]
+        confetti = []
         for i in range(20):
-            color = random.choice([(255, 0, 0), (0, 255, 0), (0, 0, 255), 
+            color = self.effects_rng.choice([(255, 0, 0), (0, 255, 0), (0, 0, 255), 
                                  (255, 255, 0), (255, 0, 255), (0, 255, 255)])
-            pos = (random.randint(100, SCREEN_WIDTH-100), random.randint(100, 500))
-            pygame.draw.circle(screen, color, pos, 5)
+            pos = (self.effects_rng.randint(100, SCREEN_WIDTH-100), self.effects_rng.randint(100, 500))
+            confetti.append((color, pos))
+        return confetti
     
-    def draw(self):
-        """Draw game screen"""
+    def draw_scene(self):
+        """Draw the whole game screen into the display surface"""
         screen.fill(BACKGROUND_COLOR)
         
         # Draw cards
-        if self.computer_card:
-            self.draw_card(self.computer_card, (SCREEN_WIDTH//2 - 60, 100))
-        if self.player_card:
-            self.draw_card(self.player_card, (SCREEN_WIDTH//2 - 60, 400))
+        if self.computer_card is not None:
+            self.draw_card(self.computer_card, COMPUTER_CARD_RECT.topleft)
+        if self.player_card is not None:
+            self.draw_card(self.player_card, PLAYER_CARD_RECT.topleft)
         
         # Draw buttons
         self.draw_buttons()
         
         # Draw score
-        score_text = self.fonts["medium"].render(f"Score: {self.player_score}", True, TEXT_COLOR)
-        screen.blit(score_text, (20, 20))
+        score_text = self.text_cache.render(self.fonts["medium"], f"Score: {self.player_score}", True, TEXT_COLOR)
+        screen.blit(score_text, SCORE_RECT.topleft)
         
         # Draw instruction dialog
         if self.show_instruction_dialog:
@@ -547,108 +470,211 @@ class PokerGame:
         # Draw game over screen
         if self.game_state == "game_over":
             self.draw_game_over()
-        
-        pygame.display.flip()
+    
+    def region_keys(self):
+        """(rect, content key) of each screen region that can change"""
+        waiting = self.game_state == "waiting_guess"
+        hint = self.show_hint_dialog and (tuple(self.hint_probabilities.values()), self.hint_best,
+                                          tuple(self.hint_values.values()))
+        shuffle = self.show_shuffle_dialog and (self.shuffle_info["total_cards"],
+                                                tuple(self.shuffle_info["previous_order"]),
+                                                tuple(self.shuffle_info["current_order"]))
+        return {
+            "computer_card": (COMPUTER_CARD_RECT, self.computer_card,
+                              self.computer_card is not None and self.is_revealed(self.computer_card)),
+            "player_card": (PLAYER_CARD_RECT, self.player_card,
+                            self.player_card is not None and self.is_revealed(self.player_card)),
+            "score": (SCORE_RECT, self.player_score),
+            "start_new": (self.buttons["start_new"], self.game_state == "game_over"),
+            "actions": (ACTION_BUTTONS_RECT, waiting),
+            "guesses": (GUESS_BUTTONS_RECT, waiting),
+            "instruction": (INSTRUCTION_DIALOG_RECT, self.show_instruction_dialog),
+            "hint": (HINT_DIALOG_RECT, hint),
+            "shuffle": (SHUFFLE_DIALOG_RECT, shuffle),
+            "result": (RESULT_RECT, self.show_result and tuple(self.result_info.values())),
+            "game_over": (CONFETTI_RECT, self.game_state == "game_over" and tuple(self.confetti)),
+        }
+    
+    def invalidate(self):
+        """Force a full redraw on the next frame"""
+        self.last_region_keys = None
+    
+    def render(self):
+        """Draw the frame; return True for a full flip or the list of rects to update"""
+        open_display()
+        self.confetti = self.throw_confetti() if self.game_state == "game_over" else ()
+        if not self.dirty_rendering:
+            self.draw_scene()
+            return True
+        
+        region_keys = self.region_keys()
+        if self.last_region_keys is None:
+            # First frame or exposed window: repaint and flip everything
+            self.draw_scene()
+            dirty_rects = True
+        else:
+            dirty_rects = [key[0] for name, key in region_keys.items()
+                           if self.last_region_keys[name] != key]
+            # Repaint only the changed regions, every layer clipped to each
+            for rect in dirty_rects:
+                screen.set_clip(rect)
+                self.draw_scene()
+            screen.set_clip(None)
+        
+        self.last_region_keys = region_keys
+        return dirty_rects
+    
+    def present(self, dirty_rects):
+        """Push a rendered frame to the display"""
+        if screen is not pygame.display.get_surface():
+            return  # Offscreen: nothing to show
+        if dirty_rects is True:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+    
+    def draw(self):
+        """Draw game screen"""
+        self.present(self.render())
     
     def handle_click(self, mouse_pos):
-        """Handle mouse click"""
-        for button_name, button_rect in self.buttons.items():
-            if button_rect.collidepoint(mouse_pos):
-                return self.handle_button_click(button_name)
-        return "continue"
+        """Handle mouse click on a button that is active now: drawn in this
+        state and not covered by an open dialog"""
+        button_name = self.hit_grid.hit(mouse_pos, self.active_buttons())
+        if button_name is None:
+            return "continue"
+        return self.handle_button_click(button_name)
     
-    def handle_button_click(self, button_name):
+    def handle_button_click(self, button_name, context=None):
         """Handle button click"""
-        print(f"Button clicked: {button_name}")  # Debug
-        
-        if button_name == "start_new":
-            if self.game_state in ["idle", "game_over"]:
-                self.start_new_game()
-                self.show_result = False
-                self.show_hint_dialog = False
-                self.show_shuffle_dialog = False
-                self.show_instruction_dialog = False
-            
-        elif button_name == "exit":
-            return "exit"
-            
-        elif button_name == "instruction" and self.game_state == "waiting_guess":
-            self.show_instruction_dialog = True
-            
-        elif button_name == "shuffle" and self.game_state == "waiting_guess":
-            self.shuffle_deck()
-            
-        elif button_name == "hint" and self.game_state == "waiting_guess":
-            self.hint_probabilities = self.calculate_probabilities()
-            self.show_hint_dialog = True
-            
-        elif button_name == "instruction_ok" and self.show_instruction_dialog:
-            self.show_instruction_dialog = False
-            
-        elif button_name == "hint_ok" and self.show_hint_dialog:
-            self.show_hint_dialog = False
-            
-        elif button_name == "shuffle_ok" and self.show_shuffle_dialog:
-            self.show_shuffle_dialog = False
-            print("Shuffle dialog closed")  # Debug
-            
-        elif button_name in ["higher", "lower", "tie"] and self.game_state == "waiting_guess":
-            is_correct, score_added, bonus = self.check_guess(button_name)
-            self.show_result = True
-            self.result_info = {
-                "is_correct": is_correct,
-                "score_added": score_added,
-                "bonus": bonus
-            }
-            self.game_state = "revealing"
-            self.result_start_time = pygame.time.get_ticks()
-        
-        return "continue"
-    
-    def update(self):
-        """Update game state"""
-        # Handle automatic computer card reveal
-        if (self.game_state == "dealing" and 
-            self.computer_card and 
-            not self.computer_card.is_revealed):
-            # Wait 1 second then reveal computer card
-            if pygame.time.get_ticks() - self.deal_start_time > 1000:
-                self.reveal_card(self.computer_card)
-                self.game_state = "waiting_guess"
-        
-        # Handle automatic next round after showing result for 2 seconds
-        if (self.game_state == "revealing" and 
-            self.show_result and
-            pygame.time.get_ticks() - self.result_start_time > 2000):
-            
-            if len(self.card_deck) >= 2:
-                self.next_round()
-                self.show_result = False
-            else:
-                self.game_state = "game_over"
-                self.show_result = False
+        hint_dialog_open = self.show_hint_dialog
+        result = super().handle_button_click(button_name, context)
+        if self.show_hint_dialog and not hint_dialog_open:
+            from GuessHighLow_solver import guess_values, optimal_guess, solvable
+            self.hint_best = optimal_guess(self)
+            self.hint_values = guess_values(self) if solvable(self) else {}
+        return result
+
+def handle_event(game, event, profiler):
+    """Handle one event, return False when the game should quit"""
+    if event.type == pygame.QUIT:
+        return False
+        
+    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+        game.invalidate()
+        
+    elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+        profiler.visible = not profiler.visible
+        game.invalidate()
+        
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        if event.button == 1:  # Left click
+            result = game.handle_click(event.pos)
+            if result == "exit":
+                return False
+                
+    elif event.type == TIMER_EVENT:
+        game.run_timer(event.timer)
+        
+    return True
+
+def draw_frame(game, profiler):
+    """Render, add the profiler overlay when shown, and present the frame"""
+    with profiler.measure("draw"):
+        dirty_rects = game.render()
+        if profiler.visible:
+            overlay_rect = profiler.draw(screen, game.fonts["small"])
+            if dirty_rects is not True:
+                dirty_rects = dirty_rects + [overlay_rect]
+    with profiler.measure("flip"):
+        game.present(dirty_rects)
+    profiler.end_frame()
+
+def run_fixed_loop(game, clock, profiler):
+    """Poll events and redraw at a fixed frame rate"""
+    running = True
+    while running:
+        with profiler.measure("events"):
+            for event in pygame.event.get():
+                running = handle_event(game, event, profiler) and running
+        
+        with profiler.measure("update"):
+            game.update()
+        draw_frame(game, profiler)
+        clock.tick(FRAME_RATE)
+
+def run_event_loop(game, clock, profiler):
+    """Sleep until input or a timer arrives, run at full rate only while animating"""
+    # Nothing reacts to the pointer moving, so it must not wake the loop up to redraw
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    running = True
+    while running:
+        game.schedule_timer()
+        if game.is_animating() or profiler.visible:
+            clock.tick(FRAME_RATE)
+            events = pygame.event.get()
+        else:
+            events = [pygame.event.wait(IDLE_TIMEOUT)] + pygame.event.get()
+        
+        with profiler.measure("events"):
+            for event in events:
+                running = handle_event(game, event, profiler) and running
+        
+        draw_frame(game, profiler)
 
 # Main game loop
 def main():
+    parser = argparse.ArgumentParser(description="Guess High Low")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen regions instead of flipping every frame")
+    parser.add_argument("--loop", choices=["fixed", "event"], default="fixed",
+                        help="fixed: redraw at 60 FPS; event: sleep until input or a timer fires")
+    parser.add_argument("--profile", action="store_true",
+                        help="show the frame-time overlay (toggle with F3) and write a histogram on exit")
+    parser.add_argument("--profile-output", default="frame_times.csv",
+                        help="frame-time histogram file written with --profile")
+    parser.add_argument("--leaderboard", nargs="?", const="", metavar="PATH",
+                        help="keep final scores in a SQLite leaderboard (default file leaderboard.db)")
+    parser.add_argument("--player", default=None, help="name recorded on the leaderboard")
+    parser.add_argument("--record", metavar="PATH",
+                        help="append a replay log of every game to PATH")
+    parser.add_argument("--decks", type=int, default=1, help="play from a shoe of N 54-card decks")
+    parser.add_argument("--bot", metavar="NAME",
+                        help="auto-play with a bot (see GuessHighLow_bots.BOTS): it guesses and starts new games by itself")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="run the card flip and result timers FACTOR times faster (demos with --bot)")
+    args = parser.parse_args()
+    # Optional features import their modules only when asked for, to keep startup short
+    if args.bot:
+        from GuessHighLow_bots import BOTS
+        if args.bot not in BOTS:
+            parser.error(f"--bot must be one of {', '.join(sorted(BOTS))}")
+    
+    open_display()
     clock = pygame.time.Clock()
-    game = PokerGame()
-    running = True
+    game_clock = ScaledClock(args.speed) if args.speed != 1.0 else None
+    game = PokerGame(dirty_rendering=args.dirty_rects, decks=args.decks, clock=game_clock)
+    if args.record:
+        from GuessHighLow_replay import ReplayRecorder
+        game.recorder = ReplayRecorder(args.record)
+    if args.bot:
+        game.bot = BOTS[args.bot](game.rng.spawn(1)[0])
+    if args.leaderboard is not None:
+        from GuessHighLow_leaderboard import DEFAULT_PATH, Leaderboard, default_player
+        game.leaderboard = Leaderboard(args.leaderboard or DEFAULT_PATH)
+        game.player_name = args.player or (f"bot:{args.bot}" if args.bot else default_player())
+    profiler = FrameProfiler(visible=args.profile)
+    if args.loop == "event":
+        run_event_loop(game, clock, profiler)
+    else:
+        run_fixed_loop(game, clock, profiler)
     
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-                
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left click
-                    mouse_pos = pygame.mouse.get_pos()
-                    result = game.handle_click(mouse_pos)
-                    if result == "exit":
-                        running = False
-        
-        game.update()
-        game.draw()
-        clock.tick(60)
+    if args.profile:
+        profiler.write_histogram(args.profile_output)
+    if game.recorder is not None:
+        game.recorder.finish(game)
+    if game.leaderboard is not None:
+        game.leaderboard.close()
     
     pygame.quit()
     sys.exit()
@@ -0,0 +1,336 @@
+"""Shuffle audit: uniformity tests over millions of dealt decks.
+
+Decks come from GameEngine.start_new_game(), the path every real game
+takes: a fresh game seed, a new shuffle stream and a full-deck shuffle
+(source "game"). Source "numpy" draws reference permutations from
+GameRng.permutations() instead. Decks are kept as rows of 54 uint8 card
+codes, which can be saved to and re-audited from a .npy file.
+
+Tests, all computed with NumPy over whole batches:
+    position   chi-square of card-by-position counts scaled by (54 - 1) / 54,
+               (54 - 1)^2 df
+    adjacency  chi-square of ordered pairs of neighbouring cards, (54 - 1)^2 df
+    runs       chi-square of the number of alternating runs (rises and
+               falls) per deck against its exact distribution
+p-values use the chi-square survival function implemented here, so no
+SciPy is needed. --calibrate repeats small audits of a source to check that
+the statistics average their df and fail at about the nominal rate.
+
+Usage:
+    python GuessHighLow_audit.py -n 10000000 --seed 1 --report audit.txt
+    python GuessHighLow_audit.py -n 1000000 --output decks.npy
+    python GuessHighLow_audit.py --input decks.npy
+    python GuessHighLow_audit.py --calibrate 1000 -n 2000 --source numpy
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from GuessHighLow_engine import DECK_SIZE, GameEngine, GameRng
+
+ALPHA = 0.001             # A test fails below this p-value
+MIN_EXPECTED = 5          # Run-count bins are merged until they expect this many decks
+
+
+# Deck sources
+def game_shuffles(count, rng):
+    """Decks dealt through GameEngine.start_new_game()"""
+    engine = GameEngine(rng=rng)
+    decks = np.empty((count, DECK_SIZE), dtype=np.uint8)
+    for row in decks:
+        engine.start_new_game()
+        row[:] = np.frombuffer(engine.card_deck, dtype=np.uint8)
+    return decks
+
+
+def numpy_shuffles(count, rng):
+    """Reference decks from NumPy's PCG64"""
+    return rng.permutations(count, DECK_SIZE)
+
+
+SOURCES = {
+    "game": game_shuffles,
+    "numpy": numpy_shuffles,
+}
+
+
+def generate_batch(source, count, rng):
+    """Worker: count decks from the named source"""
+    return SOURCES[source](count, rng)
+
+
+# Distributions
+def gamma_q(a, x):
+    """Regularized upper incomplete gamma function Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Series for P(a, x)
+        term = total = 1.0 / a
+        n = a
+        while term > total * 1e-16:
+            n += 1
+            term *= x / n
+            total += term
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Continued fraction for Q(a, x), modified Lentz
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 100_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def chi2_sf(statistic, df):
+    """P(X >= statistic) for a chi-square variable with df degrees of freedom"""
+    return gamma_q(df / 2, statistic / 2)
+
+
+def alternating_runs_distribution(n):
+    """Probability of each number of alternating runs (index) in a random permutation of n
+
+    Counts follow Andre's recurrence
+    P(n, k) = k P(n-1, k) + 2 P(n-1, k-1) + (n-k) P(n-1, k-2).
+    """
+    counts = [0, 2]  # n = 2: one run, both orders
+    for size in range(3, n + 1):
+        previous = counts + [0, 0]
+        counts = [0] * size
+        for k in range(1, size):
+            counts[k] = (k * previous[k] + 2 * previous[k - 1]
+                         + (size - k) * (previous[k - 2] if k >= 2 else 0))
+    total = math.factorial(n)
+    return np.array([count / total for count in counts])
+
+
+# Statistics
+class ShuffleStats:
+    """Running counts of a stream of decks"""
+
+    def __init__(self, size=DECK_SIZE):
+        self.size = size
+        self.decks = 0
+        self.position_counts = np.zeros((size, size), dtype=np.int64)  # [card, position]
+        self.pair_counts = np.zeros(size * size, dtype=np.int64)       # card * size + next card
+        self.run_counts = np.zeros(size, dtype=np.int64)               # decks per number of runs
+
+    def add(self, decks):
+        decks = np.asarray(decks)
+        count, size = decks.shape
+        self.decks += count
+        positions = np.broadcast_to(np.arange(size), decks.shape)
+        self.position_counts += np.bincount((decks.astype(np.int64) * size + positions).ravel(),
+                                            minlength=size * size).reshape(size, size)
+        pairs = decks[:, :-1].astype(np.int64) * size + decks[:, 1:]
+        self.pair_counts += np.bincount(pairs.ravel(), minlength=size * size)
+        rises = decks[:, 1:] > decks[:, :-1]
+        runs = 1 + np.count_nonzero(rises[:, 1:] != rises[:, :-1], axis=1)
+        self.run_counts += np.bincount(runs, minlength=size)
+
+    def position_test(self):
+        # Every deck adds a permutation matrix, so all row and column sums are
+        # fixed: Pearson's statistic has mean size (size - 1), and scaled by
+        # (size - 1) / size it is chi-square with (size - 1)^2 df
+        expected = self.decks / self.size
+        statistic = float(((self.position_counts - expected) ** 2).sum() / expected)
+        return statistic * (self.size - 1) / self.size, (self.size - 1) ** 2
+
+    def adjacency_test(self):
+        observed = self.pair_counts.reshape(self.size, self.size)
+        off_diagonal = ~np.eye(self.size, dtype=bool)
+        # A given ordered pair appears at most once per deck, with probability 1 / size:
+        # each cell is binomial, so the statistic has mean size (size - 1) (1 - 1 / size) = (size - 1)^2
+        expected = self.decks / self.size
+        statistic = float(((observed[off_diagonal] - expected) ** 2).sum() / expected)
+        return statistic, (self.size - 1) ** 2
+
+    def runs_test(self):
+        probabilities = alternating_runs_distribution(self.size)
+        observed_bins, expected_bins = [], []
+        observed = expected = 0.0
+        for runs in range(1, self.size):
+            observed += self.run_counts[runs]
+            expected += probabilities[runs] * self.decks
+            if expected >= MIN_EXPECTED:
+                observed_bins.append(observed)
+                expected_bins.append(expected)
+                observed = expected = 0.0
+        if expected_bins:
+            # Fold the sparse tail into the last bin
+            observed_bins[-1] += observed
+            expected_bins[-1] += expected
+        observed_bins = np.array(observed_bins)
+        expected_bins = np.array(expected_bins)
+        statistic = float(((observed_bins - expected_bins) ** 2 / expected_bins).sum())
+        return statistic, max(1, len(expected_bins) - 1)
+
+    def mean_runs(self):
+        runs = np.arange(self.size)
+        return float((runs * self.run_counts).sum() / self.decks) if self.decks else 0.0
+
+    def results(self):
+        """(name, statistic, df, p-value) per test"""
+        rows = []
+        for name, test in (("position", self.position_test), ("adjacency", self.adjacency_test),
+                           ("runs", self.runs_test)):
+            statistic, df = test()
+            rows.append((name, statistic, df, chi2_sf(statistic, df)))
+        return rows
+
+
+# Audit
+def run_audit(n_decks, source="game", workers=None, batch_size=100_000, seed=None,
+              output=None, progress=None):
+    """Deal n_decks across a process pool and gather their statistics"""
+    workers = workers or os.cpu_count()
+    batches = [min(batch_size, n_decks - start) for start in range(0, n_decks, batch_size)]
+    batch_rngs = GameRng(seed).spawn(len(batches))
+    stored = None
+    if output:
+        stored = np.lib.format.open_memmap(output, mode="w+", dtype=np.uint8, shape=(n_decks, DECK_SIZE))
+    stats = ShuffleStats()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        start = 0
+        for size, batch_rng in zip(batches, batch_rngs):
+            futures[pool.submit(generate_batch, source, size, batch_rng)] = start
+            start += size
+        for future in as_completed(futures):
+            decks = future.result()
+            stats.add(decks)
+            if stored is not None:
+                start = futures[future]
+                stored[start:start + len(decks)] = decks  # In batch order, whatever order they finish in
+            if progress:
+                progress(stats)
+    if stored is not None:
+        stored.flush()
+    return stats
+
+
+def calibrate(runs, n_decks, source="game", seed=None, alpha=ALPHA, progress=None):
+    """Repeat audits of n_decks decks, return (name, mean statistic, df, fail rate) per test
+
+    For a uniform source the mean is close to df and the fail rate to alpha.
+    """
+    run_rngs = GameRng(seed).spawn(runs)
+    totals = {}
+    for index, run_rng in enumerate(run_rngs, 1):
+        stats = ShuffleStats()
+        stats.add(SOURCES[source](n_decks, run_rng))
+        for name, statistic, df, p_value in stats.results():
+            total = totals.setdefault(name, [0.0, df, 0])
+            total[0] += statistic
+            total[2] += p_value < alpha
+        if progress:
+            progress(index)
+    return [(name, statistic_sum / runs, df, failures / runs)
+            for name, (statistic_sum, df, failures) in totals.items()]
+
+
+def calibration_report(rows, runs, n_decks, source, alpha=ALPHA):
+    lines = [
+        "Guess High Low shuffle audit calibration",
+        f"Source: {source}, {runs:,} runs of {n_decks:,} decks",
+        "",
+        f"{'Test':<12}{'Mean':>12}{'df':>8}{'Fail rate':>12}  (alpha {alpha})",
+    ]
+    for name, mean, df, fail_rate in rows:
+        lines.append(f"{name:<12}{mean:>12.1f}{df:>8}{fail_rate:>12.4f}")
+    return "\n".join(lines)
+
+
+def audit_file(path, chunk_size=1_000_000, progress=None):
+    """Statistics of decks saved with --output"""
+    decks = np.load(path, mmap_mode="r")
+    stats = ShuffleStats(decks.shape[1])
+    for start in range(0, len(decks), chunk_size):
+        stats.add(decks[start:start + chunk_size])
+        if progress:
+            progress(stats)
+    return stats
+
+
+def report(stats, source, elapsed, seed):
+    lines = [
+        "Guess High Low shuffle audit",
+        f"Source: {source}" + (f", seed {seed}" if seed is not None else ""),
+        f"Decks: {stats.decks:,} of {stats.size} cards in {elapsed:.1f} s "
+        f"({stats.decks / elapsed:,.0f} decks/s)" if elapsed > 0 else f"Decks: {stats.decks:,}",
+        f"Mean alternating runs: {stats.mean_runs():.4f} (expected {(2 * stats.size - 1) / 3:.4f})",
+        "",
+        f"{'Test':<12}{'Chi-square':>14}{'df':>8}{'p-value':>12}  Result (alpha {ALPHA})",
+    ]
+    for name, statistic, df, p_value in stats.results():
+        verdict = "PASS" if p_value >= ALPHA else "FAIL"
+        lines.append(f"{name:<12}{statistic:>14.1f}{df:>8}{p_value:>12.4f}  {verdict}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guess High Low shuffle audit")
+    parser.add_argument("-n", "--decks", type=int, default=1_000_000)
+    parser.add_argument("--source", choices=sorted(SOURCES), default="game",
+                        help="game: GameEngine.start_new_game(); numpy: reference PCG64 permutations")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="decks per worker task")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="also save the decks to this .npy file")
+    parser.add_argument("--input", help="audit decks saved with --output instead of dealing new ones")
+    parser.add_argument("--report", help="write the report to this file too")
+    parser.add_argument("--calibrate", type=int, metavar="RUNS",
+                        help="run RUNS audits of --decks decks each and report mean statistics and fail rates")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        rows = calibrate(args.calibrate, args.decks, args.source, args.seed,
+                         progress=lambda index: print(f"\r{index:,} runs", end="", flush=True))
+        print()
+        text = calibration_report(rows, args.calibrate, args.decks, args.source)
+        print(text)
+        if args.report:
+            with open(args.report, "w") as f:
+                f.write(text + "\n")
+        return
+
+    def progress(stats):
+        print(f"\r{stats.decks:,} decks", end="", flush=True)
+
+    start = time.perf_counter()
+    if args.input:
+        stats = audit_file(args.input, progress=progress)
+        source = args.input
+    else:
+        stats = run_audit(args.decks, args.source, args.workers, args.batch_size, args.seed,
+                          args.output, progress)
+        source = args.source
+    elapsed = time.perf_counter() - start
+    print()
+
+    text = report(stats, source, elapsed, None if args.input else args.seed)
+    print(text)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Benchmarks for the engine and render hot paths of both shipped variants.
+
+Each benchmark runs through the variant's own PokerGame, with pygame on
+the SDL dummy video driver, and reports ops/sec, p50/p99 latency and the
+peak memory allocated while it runs. ops/sec is the median of several
+timed trials, and the trials' spread is kept with it. Results can be saved
+as JSON and compared against a stored baseline: a benchmark regresses when
+its median drops by more than the threshold or the two runs' combined
+spread, whichever is larger, and still does when it is run again.
+
+Usage:
+    python GuessHighLow_bench.py --save-baseline bench_baseline.json
+    python GuessHighLow_bench.py --baseline bench_baseline.json --output bench_results.json
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+VARIANTS = {
+    "debug": "GuessHighLow_20251004p_debug",
+    "rc": "GuessHighLow_20251004r_rc",
+}
+REGRESSION_THRESHOLD = 0.10  # Fail when ops/sec drops by more than 10%, or by more than the noise
+TRIALS = 5                   # Timed trials per benchmark
+
+
+def waiting_game(module):
+    """A game dealt and waiting for the player's guess"""
+    game = module.PokerGame()
+    game.start_new_game()
+    game.reveal_computer_card()
+    return game
+
+
+def bench_calculate_probabilities(module):
+    game = waiting_game(module)
+
+    def op():
+        game.round_probabilities = None  # Measure the computation, not the per-round cache
+        game.calculate_probabilities()
+    return op
+
+
+def bench_deal_reveal(module):
+    game = module.PokerGame()
+
+    def op():
+        if game.cards_left() < 2:
+            game.initialize_deck()
+        for card in game.deal_cards(2):
+            game.reveal_card(card)
+    return op
+
+
+def bench_full_game(module):
+    game = module.PokerGame()
+
+    def op():
+        game.start_new_game()
+        while game.game_state != "game_over":
+            game.reveal_computer_card()
+            probabilities = game.calculate_probabilities()
+            game.make_guess(max(("higher", "lower", "tie"), key=probabilities.get))
+            game.finish_round()
+    return op
+
+
+def bench_shoe_start(module):
+    game = module.PokerGame(decks=100)
+    return game.start_new_game
+
+
+def bench_draw_frame(module):
+    game = waiting_game(module)
+    game.handle_button_click("hint")
+    return game.draw
+
+
+BENCHMARKS = {
+    "calculate_probabilities": (bench_calculate_probabilities, 100_000),
+    "deal_reveal": (bench_deal_reveal, 100_000),
+    "full_game": (bench_full_game, 2_000),
+    "shoe_start": (bench_shoe_start, 2_000),
+    "draw_frame": (bench_draw_frame, 2_000),
+}
+
+
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def run_benchmark(make_op, module, iterations, trials=TRIALS):
+    """Time trials runs of iterations calls of the op, then measure peak memory in a shorter pass"""
+    op = make_op(module)
+    for _ in range(min(iterations // 10, 1000)):  # Warm up caches
+        op()
+
+    samples = []
+    rates = []
+    clock = time.perf_counter_ns
+    for _ in range(trials):
+        start = clock()
+        for _ in range(iterations):
+            before = clock()
+            op()
+            samples.append(clock() - before)
+        rates.append(iterations * 1e9 / (clock() - start))
+    samples.sort()
+    rates.sort()
+    median = statistics.median(rates)
+
+    tracemalloc.start()
+    op = make_op(module)
+    for _ in range(min(iterations, 1000)):
+        op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "trials": trials,
+        "ops_per_sec": median,
+        "spread": (rates[-1] - rates[0]) / median,  # Relative range of the trials' ops/sec
+        "p50_us": percentile(samples, 0.50) / 1000,
+        "p99_us": percentile(samples, 0.99) / 1000,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def run_suite(variants, benchmarks, scale=1.0, trials=TRIALS):
+    """Results by variant and benchmark; benchmarks is a list of names, or a dict of
+    names by variant"""
+    results = {}
+    for variant in variants:
+        with contextlib.redirect_stdout(io.StringIO()):  # Debug variant prints on every click
+            module = importlib.import_module(VARIANTS[variant])
+        results[variant] = {}
+        names = benchmarks[variant] if isinstance(benchmarks, dict) else benchmarks
+        for name in names:
+            make_op, iterations = BENCHMARKS[name]
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[variant][name] = run_benchmark(make_op, module, max(1, int(iterations * scale)), trials)
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """{variant: {benchmark: description}} of every benchmark slower than the baseline allows
+
+    The allowed drop is threshold, or the spread of both runs' trials when
+    that is larger, so noise alone does not count as a regression.
+    """
+    regressions = {}
+    for variant, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            reference = baseline.get(variant, {}).get(name)
+            if not reference:
+                continue
+            allowed = max(threshold, result.get("spread", 0) + reference.get("spread", 0))
+            ratio = result["ops_per_sec"] / reference["ops_per_sec"]
+            if ratio < 1 - allowed:
+                regressions.setdefault(variant, {})[name] = (
+                    f"{variant}/{name}: {result['ops_per_sec']:,.0f} ops/s, {ratio:.0%} of baseline "
+                    f"{reference['ops_per_sec']:,.0f} (allowed drop {allowed:.0%})")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"{'Benchmark':<32}{'ops/s':>14}{'p50 us':>10}{'p99 us':>10}{'peak KB':>10}{'vs base':>9}")
+    for variant, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            reference = (baseline or {}).get(variant, {}).get(name)
+            change = f"{result['ops_per_sec'] / reference['ops_per_sec']:.0%}" if reference else ""
+            print(f"{variant + '/' + name:<32}{result['ops_per_sec']:>14,.0f}{result['p50_us']:>10.2f}"
+                  f"{result['p99_us']:>10.2f}{result['peak_memory_kb']:>10.1f}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guess High Low benchmark suite")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=sorted(VARIANTS))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    parser.add_argument("--trials", type=int, default=TRIALS, help="timed trials per benchmark")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a baseline JSON and fail on regressions")
+    parser.add_argument("--save-baseline", help="write results as the new baseline JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed ops/sec drop before a benchmark counts as a regression, "
+                             "at least the measured spread")
+    args = parser.parse_args()
+
+    results = run_suite(args.variants, args.benchmarks, args.scale, args.trials)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            # Only regressions that show up again on a second run count
+            rerun = run_suite(list(regressions), {variant: list(names) for variant, names in regressions.items()},
+                              args.scale, args.trials)
+            regressions = compare(rerun, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for benchmarks in regressions.values():
+                for line in benchmarks.values():
+                    print("  " + line)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
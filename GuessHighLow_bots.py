@@ -0,0 +1,126 @@
+"""Pluggable guessing bots for Guess High Low.
+
+A bot takes the place of the player's higher/lower/tie clicks. It sees
+what the player sees, as a GuessHighLow_engine.TableView: the computer
+card's value, the unrevealed cards per value, the outs of each guess and
+the score so far.
+
+    decide(view)        one game; returns a guess name
+    decide_batch(view)  many games in one call; the view's fields are
+                        NumPy arrays with one entry per game, returns an
+                        array of guess codes (indexes into GUESSES)
+
+Setting engine.bot lets a GameEngine play by itself: the engine clicks the
+bot's guess through handle_button_click() when its "bot" timer fires, so
+the game window (--bot), the server and replay logs see ordinary clicks.
+GuessHighLow_tournament runs the same bots headless through decide() and
+GuessHighLow_sim through decide_batch(). numpy is only imported by the
+batched calls.
+"""
+from abc import ABC, abstractmethod
+
+from GuessHighLow_engine import GUESSES, BONUS_PROBABILITY, BONUS_SCORE, CORRECT_SCORE, GameRng, TableView
+from GuessHighLow_solver import guess_points
+
+# Guess codes returned by decide_batch(), in GUESSES order
+HIGHER, LOWER, TIE = range(len(GUESSES))
+
+
+def game_view(view, index):
+    """TableView of one game of a batched view"""
+    return TableView(int(view.computer[index]), view.counts[:, index].tolist(), int(view.score[index]),
+                     int(view.higher[index]), int(view.lower[index]), int(view.tie[index]))
+
+
+class Bot(ABC):
+    """Base class: subclasses implement decide(), and decide_batch() for throughput"""
+    name = "bot"
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else GameRng()
+
+    @abstractmethod
+    def decide(self, view):
+        """Guess name for the game the TableView describes"""
+
+    def decide_batch(self, view):
+        """Fallback: one decide() call per game"""
+        import numpy as np
+        codes = {guess: code for code, guess in enumerate(GUESSES)}
+        return np.array([codes[self.decide(game_view(view, index))]
+                         for index in range(len(view.computer))], dtype=np.int8)
+
+
+class MostLikelyBot(Bot):
+    """Guess the outcome with the most outs (ties go to higher, then lower)"""
+    name = "most_likely"
+
+    def decide(self, view):
+        outs = {"higher": view.higher, "lower": view.lower, "tie": view.tie}
+        return max(GUESSES, key=outs.get)
+
+    def decide_batch(self, view):
+        import numpy as np
+        guess = np.where(view.lower > view.higher, LOWER, HIGHER)
+        best = np.maximum(view.higher, view.lower)
+        return np.where(view.tie > best, TIE, guess)
+
+
+class BestPointsBot(Bot):
+    """Guess with the highest expected points, bonus included
+
+    This is the optimal play (see GuessHighLow_solver): the guess does not
+    change which cards come next, only this round's points.
+    """
+    name = "best_points"
+
+    def decide(self, view):
+        outs = {"higher": view.higher, "lower": view.lower, "tie": view.tie}
+        total = view.remaining
+        return max(GUESSES, key=lambda guess: guess_points(outs[guess], total))
+
+    def decide_batch(self, view):
+        import numpy as np
+        total = view.remaining
+        points = []
+        for outs in (view.higher, view.lower, view.tie):
+            probability = outs / total
+            points.append(probability * np.where(probability < BONUS_PROBABILITY, BONUS_SCORE, CORRECT_SCORE))
+        guess = np.where(points[LOWER] > points[HIGHER], LOWER, HIGHER)
+        best = np.maximum(points[HIGHER], points[LOWER])
+        return np.where(points[TIE] > best, TIE, guess)
+
+
+class BonusHuntingBot(Bot):
+    """Go for the 100-point bonus whenever any guess is under 10%"""
+    name = "bonus_hunting"
+
+    def decide(self, view):
+        total = view.remaining
+        probabilities = {guess: outs / total if total else 0
+                         for guess, outs in zip(GUESSES, (view.higher, view.lower, view.tie))}
+        long_shots = [guess for guess in GUESSES if 0 < probabilities[guess] < BONUS_PROBABILITY]
+        if long_shots:
+            return max(long_shots, key=probabilities.get)
+        return max(GUESSES, key=probabilities.get)
+
+    def decide_batch(self, view):
+        import numpy as np
+        probabilities = np.stack((view.higher, view.lower, view.tie)) / view.remaining
+        long_shot = (probabilities > 0) & (probabilities < BONUS_PROBABILITY)
+        # Any long shot ranks above every other guess
+        return np.argmax(np.where(long_shot, probabilities + 1, probabilities), axis=0)
+
+
+class RandomBot(Bot):
+    """Guess uniformly at random"""
+    name = "random"
+
+    def decide(self, view):
+        return self.rng.choice(GUESSES)
+
+    def decide_batch(self, view):
+        return self.rng.generator().integers(0, len(GUESSES), size=len(view.computer))
+
+
+BOTS = {bot.name: bot for bot in (MostLikelyBot, BestPointsBot, BonusHuntingBot, RandomBot)}
@@ -0,0 +1,686 @@
+"""Guess High Low game engine.
+
+Deck, state machine and scoring rules of the game without any pygame
+dependency. The pygame window in GuessHighLow_20251004*.py is a frontend
+over this module; headless tools and tests can drive GameEngine directly.
+"""
+import os
+import random
+import time
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+from operator import methodcaller
+
+# Card values mapping
+CARD_VALUES = {
+    '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
+    '9': 9, '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
+}
+SUITS = ["Spade", "Heart", "Diamond", "Club"]
+SUIT_SIGNS = ["♠", "♥", "♦", "♣"]
+MAX_CARD_VALUE = 16           # Big Joker
+
+# Timings in milliseconds
+DEAL_REVEAL_DELAY = 1000      # Computer card flips after 1 second
+RESULT_DISPLAY_TIME = 2000    # Result banner stays for 2 seconds
+BOT_GUESS_DELAY = 700         # A bot guesses this long after the computer card flips
+BOT_RESTART_DELAY = 3000      # and starts the next game this long after game over
+
+# Scoring
+GUESSES = ("higher", "lower", "tie")
+CORRECT_SCORE = 10
+BONUS_SCORE = 100
+BONUS_PROBABILITY = 0.1       # Correct guess under 10% probability earns the bonus
+
+SHUFFLE_PREVIEW = 10          # Cards listed in the shuffle dialog
+SEED_BITS = 256               # Game seeds; a 64-bit seed would reach only 2^64 of the 54! (~2^237) deck orders
+SHUFFLE_REPLAY_CARDS = 1024   # Shuffle history kept for snapshots, and replayed on restore (~0.4 ms), up to this many cards
+
+# Modal dialogs, bottom to top; the topmost open one takes all input
+DIALOG_FLAGS = {
+    "instruction": "show_instruction_dialog",
+    "hint": "show_hint_dialog",
+    "shuffle": "show_shuffle_dialog",
+}
+GLOBAL_BUTTONS = ("exit",)    # Work in every state and over every dialog
+
+# Per-game card states, one byte per card code
+CARD_IN_DECK = 0
+CARD_DEALT = 1
+CARD_REVEALED = 2
+
+# Card class
+class Card:
+    """Immutable card definition shared by every game"""
+    __slots__ = ("card_id", "name", "value", "suit")
+
+    def __init__(self, card_id, name, value, suit=None):
+        self.card_id = card_id
+        self.name = name
+        self.value = value
+        self.suit = suit
+
+    def __str__(self):
+        if self.suit:
+            return f"{self.suit}{self.name}"
+        else:
+            return self.name
+
+def build_cards():
+    """Create the 54 card definitions; a card is coded by its index"""
+    cards = []
+
+    # Create standard cards
+    for suit, sign in zip(SUITS, SUIT_SIGNS):
+        for name, value in CARD_VALUES.items():
+            card_id = f"{suit}_{name}"
+            cards.append(Card(card_id, name, value, sign))
+
+    # Create jokers
+    cards.append(Card("little_joker", "Little Joker", 15))
+    cards.append(Card("big_joker", "Big Joker", 16))
+    return tuple(cards)
+
+CARDS = build_cards()
+DECK_SIZE = len(CARDS)
+CARD_VALUE = bytes(card.value for card in CARDS)  # Value by card code
+
+# Value histogram of a fresh deck and its prefix sums
+DECK_VALUE_COUNTS = [CARD_VALUE.count(value) for value in range(MAX_CARD_VALUE + 1)]
+DECK_VALUE_PREFIX = [sum(DECK_VALUE_COUNTS[:value + 1]) for value in range(MAX_CARD_VALUE + 1)]
+
+# Multi-deck shoes: card code = deck index * DECK_SIZE + card
+MAX_DECKS = 1000
+
+@lru_cache(maxsize=None)
+def shoe_values(decks):
+    """Value by card code for a shoe of decks, shared by all engines using it"""
+    return CARD_VALUE * decks
+
+def deck_typecode(size):
+    """Smallest array typecode holding card codes of a size-card shoe"""
+    if size <= 1 << 8:
+        return 'B'
+    if size <= 1 << 16:
+        return 'H'
+    return 'I'
+
+@lru_cache(maxsize=None)
+def fresh_shoe(decks):
+    """Card codes of an unshuffled shoe; copy before use"""
+    size = DECK_SIZE * decks
+    return array(deck_typecode(size), range(size))
+
+def card_name(card):
+    """Display name of a card code"""
+    return str(CARDS[card % DECK_SIZE])
+
+# Random number streams
+class GameRng:
+    """Seedable random stream that spawns statistically independent children
+
+    Follows numpy's SeedSequence scheme: a stream is identified by its root
+    entropy plus a spawn key, and each child extends the parent's key. Root
+    streams (empty key) produce exactly random.Random(seed)'s sequence. For
+    bulk work generator() gives the matching NumPy PCG64 generator; numpy
+    is only imported when that is used.
+    """
+    __slots__ = ("entropy", "spawn_key", "children_spawned", "random", "numpy_generator")
+
+    def __init__(self, seed=None, spawn_key=()):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(16), "little")
+        self.entropy = seed
+        self.spawn_key = tuple(spawn_key)
+        self.children_spawned = 0
+        self.random = random.Random(self.stream_seed())
+        self.numpy_generator = None
+
+    def stream_seed(self):
+        """Seed of this stream's Mersenne Twister"""
+        if not self.spawn_key:
+            return self.entropy
+        import hashlib  # Only spawned streams hash, keep it off the game's startup
+        material = repr((self.entropy, self.spawn_key)).encode()
+        return int.from_bytes(hashlib.blake2b(material, digest_size=16).digest(), "little")
+
+    def spawn(self, count):
+        """count new independent child streams"""
+        start = self.children_spawned
+        self.children_spawned += count
+        return [GameRng(self.entropy, self.spawn_key + (start + index,)) for index in range(count)]
+
+    def getrandbits(self, bits):
+        return self.random.getrandbits(bits)
+
+    def randint(self, low, high):
+        return self.random.randint(low, high)
+
+    def choice(self, sequence):
+        return self.random.choice(sequence)
+
+    def shuffle(self, sequence):
+        self.random.shuffle(sequence)
+
+    def getstate(self):
+        return self.random.getstate()
+
+    def setstate(self, state):
+        self.random.setstate(state)
+
+    def generator(self):
+        """NumPy PCG64 generator for this stream's entropy and spawn key"""
+        if self.numpy_generator is None:
+            import numpy as np
+            sequence = np.random.SeedSequence(self.entropy, spawn_key=self.spawn_key)
+            self.numpy_generator = np.random.Generator(np.random.PCG64(sequence))
+        return self.numpy_generator
+
+    def shuffled(self, values, count):
+        """count independent shuffles of values as a (count, len(values)) NumPy array"""
+        import numpy as np
+        values = np.asarray(values)
+        return self.generator().permuted(np.broadcast_to(values, (count, len(values))), axis=1)
+
+    def permutations(self, count, size):
+        """count independent permutations of range(size), one per row"""
+        import numpy as np
+        dtype = np.uint8 if size <= 256 else np.uint32
+        return self.shuffled(np.arange(size, dtype=dtype), count)
+
+# Clocks driving the timed transitions, in milliseconds
+class RealClock:
+    """Wall-clock time"""
+    instant = False
+
+    def now(self):
+        return int(time.monotonic() * 1000)
+
+    def real_ms(self, ms):
+        """Wall-clock milliseconds until ms of game time have passed"""
+        return ms
+
+class ScaledClock(RealClock):
+    """Wall-clock time sped up (or slowed down) by scale"""
+
+    def __init__(self, scale):
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        self.scale = scale
+        self.start = time.monotonic()
+
+    def now(self):
+        return int((time.monotonic() - self.start) * 1000 * self.scale)
+
+    def real_ms(self, ms):
+        return ms / self.scale
+
+class ManualClock:
+    """Time that only moves when told to: GameEngine.step() or advance()"""
+    instant = False
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, ms):
+        self.time += ms
+
+    def real_ms(self, ms):
+        return 0
+
+class InstantClock(ManualClock):
+    """Manual time that GameEngine.update() jumps straight to the next transition"""
+    instant = True
+
+REAL_CLOCK = RealClock()
+
+# What a player sees when a guess is due
+class TableView:
+    """Input to a bot's decision, see GuessHighLow_bots
+
+    computer is the computer card's value and counts the unrevealed cards
+    per value (the deck plus the player's face-down card); higher, lower
+    and tie are the unrevealed cards that win each guess. For one game the
+    fields are numbers and counts is a list; for a batch they are NumPy
+    arrays with one entry per game and counts is (MAX_CARD_VALUE + 1, games).
+    """
+    __slots__ = ("computer", "counts", "score", "higher", "lower", "tie")
+
+    def __init__(self, computer, counts, score, higher, lower, tie):
+        self.computer = computer
+        self.counts = counts
+        self.score = score
+        self.higher = higher
+        self.lower = lower
+        self.tie = tie
+
+    @property
+    def remaining(self):
+        return self.higher + self.lower + self.tie
+
+# Game engine class
+class GameEngine:
+    __slots__ = (
+        "card_deck", "deck_cursor", "card_state", "previous_deck_order",
+        "value_counts", "value_prefix", "round_probabilities",
+        "player_score", "bonus_count", "computer_card", "player_card", "game_state",
+        "deal_start_time", "result_start_time",
+        "show_hint_dialog", "hint_probabilities", "show_result", "result_info",
+        "show_shuffle_dialog", "shuffle_info", "show_instruction_dialog",
+        "decks", "card_values", "rng", "game_seed", "shuffle_rng", "shuffle_history", "recorder",
+        "bot", "clock",
+    )
+
+    def __init__(self, seed=None, rng=None, decks=1, clock=None):
+        self.clock = clock if clock is not None else REAL_CLOCK
+        self.rng = rng if rng is not None else GameRng(seed)  # Draws a seed for every new game
+        self.game_seed = self.rng.getrandbits(SEED_BITS)
+        self.shuffle_rng = GameRng(self.game_seed)  # Stream of the game's shuffles
+        self.shuffle_history = []        # Deck size of every shuffle drawn from shuffle_rng, None once too long
+        self.recorder = None             # Optional replay recorder, see GuessHighLow_replay
+        self.bot = None                  # Optional bot playing instead of the player, see GuessHighLow_bots
+
+        self.decks = 1
+        self.card_values = CARD_VALUE  # Value by card code in the current shoe
+        self.card_deck = array('B')    # Card codes in dealing order; cards before deck_cursor are dealt
+        self.deck_cursor = 0
+        self.card_state = bytearray()  # CARD_IN_DECK, CARD_DEALT or CARD_REVEALED per card code
+        self.previous_deck_order = []  # Save pre-shuffle order (first cards only)
+
+        # Histogram of undealt card values and its running prefix
+        # sums: value_prefix[v] is the number of deck cards with value <= v
+        self.value_counts = []
+        self.value_prefix = []
+        self.round_probabilities = None  # Cached for the current round
+
+        self.player_score = 0
+        self.bonus_count = 0             # Bonus guesses this game
+        self.computer_card = None        # Card codes
+        self.player_card = None
+        self.game_state = "idle"  # idle, dealing, waiting_guess, revealing, game_over
+        self.deal_start_time = 0
+        self.result_start_time = 0
+
+        self.show_hint_dialog = False
+        self.hint_probabilities = {}
+        self.show_result = False
+        self.result_info = {}
+        self.show_shuffle_dialog = False
+        self.shuffle_info = {}
+        self.show_instruction_dialog = False
+
+        self.set_decks(decks)
+
+    def now(self):
+        """Current time in milliseconds on the engine's clock"""
+        return self.clock.now()
+
+    def set_decks(self, decks):
+        """Play with a shoe of decks 54-card decks from the next deck initialization on"""
+        if not 1 <= decks <= MAX_DECKS:
+            raise ValueError(f"decks must be between 1 and {MAX_DECKS}")
+        self.decks = decks
+        self.card_values = shoe_values(decks)
+        self.initialize_deck()
+
+    def initialize_deck(self):
+        """Initialize the shoe in card code order"""
+        self.card_deck = fresh_shoe(self.decks)[:]
+        self.deck_cursor = 0
+        self.card_state = bytearray(len(self.card_deck))
+        self.previous_deck_order = self.card_deck[:SHUFFLE_PREVIEW].tolist()
+
+        # Value histogram starts from the fresh shoe's
+        self.value_counts = [count * self.decks for count in DECK_VALUE_COUNTS]
+        self.value_prefix = [count * self.decks for count in DECK_VALUE_PREFIX]
+        self.round_probabilities = None
+
+    def remove_value(self, value):
+        """Take one card of the given value out of the histogram"""
+        self.value_counts[value] -= 1
+        prefix = self.value_prefix
+        for v in range(value, MAX_CARD_VALUE + 1):
+            prefix[v] -= 1
+
+    def recount_values(self):
+        """Rebuild the value histogram and prefix sums from the undealt cards"""
+        counts = [0] * (MAX_CARD_VALUE + 1)
+        values = self.card_values
+        for card in self.card_deck[self.deck_cursor:]:
+            counts[values[card]] += 1
+        self.value_counts = counts
+        self.value_prefix = list(accumulate(counts))
+        self.round_probabilities = None
+
+    def cards_left(self):
+        """Number of cards not dealt yet"""
+        return len(self.card_deck) - self.deck_cursor
+
+    def remaining_cards(self, count=None):
+        """Undealt cards in dealing order, optionally only the first count"""
+        end = len(self.card_deck) if count is None else self.deck_cursor + count
+        return self.card_deck[self.deck_cursor:end].tolist()
+
+    def shuffle_deck(self):
+        """Shuffle deck and save pre-shuffle order"""
+        if self.cards_left():
+            # Only the dialog preview of the old order is kept
+            self.previous_deck_order = self.remaining_cards(SHUFFLE_PREVIEW)
+            remaining = self.remaining_cards()  # Lists shuffle faster than arrays
+            self.shuffle_rng.shuffle(remaining)
+            if self.shuffle_history is not None:
+                self.shuffle_history.append(len(remaining))
+                if sum(self.shuffle_history) > SHUFFLE_REPLAY_CARDS:
+                    self.shuffle_history = None  # Too slow to replay; snapshots store the stream state
+            self.card_deck[self.deck_cursor:] = array(self.card_deck.typecode, remaining)
+
+            # Prepare shuffle dialog info
+            self.shuffle_info = {
+                "previous_order": self.previous_deck_order,                 # Show first 10 cards
+                "current_order": self.remaining_cards(SHUFFLE_PREVIEW),     # Show first 10 cards
+                "total_cards": self.cards_left()
+            }
+            self.show_shuffle_dialog = True
+
+    def deal_cards(self, count):
+        """Deal specified number of cards"""
+        if self.cards_left() < count:
+            return None
+
+        dealt_cards = self.card_deck[self.deck_cursor:self.deck_cursor + count].tolist()
+        self.deck_cursor += count
+        for card in dealt_cards:
+            self.card_state[card] = CARD_DEALT
+            self.remove_value(self.card_values[card])
+        self.round_probabilities = None
+
+        return dealt_cards
+
+    def reveal_card(self, card):
+        """Reveal specified card"""
+        if self.card_state[card] == CARD_DEALT:
+            self.card_state[card] = CARD_REVEALED
+
+    def is_revealed(self, card):
+        """True if the card code has been turned face up"""
+        return self.card_state[card] == CARD_REVEALED
+
+    def start_new_game(self, seed=None):
+        """Start new game, shuffling with the given seed or a fresh one"""
+        self.game_seed = self.rng.getrandbits(SEED_BITS) if seed is None else seed
+        self.shuffle_rng = GameRng(self.game_seed)
+        self.shuffle_history = []
+        self.initialize_deck()
+        self.shuffle_deck()
+        self.player_score = 0
+        self.bonus_count = 0
+        self.computer_card = None
+        self.player_card = None
+        self.game_state = "idle"
+        self.next_round()
+
+    def next_round(self):
+        """Go to next round"""
+        if self.cards_left() >= 2:
+            # Deal two cards
+            dealt_cards = self.deal_cards(2)
+            if dealt_cards:
+                self.computer_card = dealt_cards[0]
+                self.player_card = dealt_cards[1]
+
+                self.game_state = "dealing"
+                self.deal_start_time = self.now()
+        else:
+            self.game_state = "game_over"
+
+    def probabilities_for(self, pivot):
+        """Higher/lower/tie probabilities of the unrevealed cards against a pivot value"""
+        # Unrevealed cards are the remaining deck plus player's face-down card
+        total_cards = self.cards_left()
+        lower_count = self.value_prefix[pivot - 1]
+        tie_count = self.value_counts[pivot]
+        higher_count = total_cards - self.value_prefix[pivot]
+        if self.player_card is not None:
+            total_cards += 1
+            player_value = self.card_values[self.player_card]
+            if player_value > pivot:
+                higher_count += 1
+            elif player_value < pivot:
+                lower_count += 1
+            else:
+                tie_count += 1
+
+        return {
+            "higher": higher_count / total_cards if total_cards > 0 else 0,
+            "lower": lower_count / total_cards if total_cards > 0 else 0,
+            "tie": tie_count / total_cards if total_cards > 0 else 0,
+            "remaining": total_cards
+        }
+
+    def calculate_probabilities(self):
+        """Calculate probabilities for different guesses"""
+        if self.computer_card is None or self.player_card is None:
+            return {"higher": 0, "lower": 0, "tie": 0, "remaining": 0}
+
+        # Deck only changes on deal, so the result holds for the whole round
+        if self.round_probabilities is None:
+            self.round_probabilities = self.probabilities_for(self.card_values[self.computer_card])
+        return self.round_probabilities
+
+    def table_view(self):
+        """What the player knows while a guess is due, as a TableView"""
+        counts = self.value_counts.copy()
+        if self.player_card is not None and not self.is_revealed(self.player_card):
+            counts[self.card_values[self.player_card]] += 1
+        pivot = self.card_values[self.computer_card]
+        return TableView(pivot, counts, self.player_score,
+                         sum(counts[pivot + 1:]), sum(counts[:pivot]), counts[pivot])
+
+    def check_guess(self, player_guess):
+        """Check player's guess and calculate score"""
+        if self.computer_card is None or self.player_card is None:
+            return False, 0, False
+
+        # Reveal player card
+        self.reveal_card(self.player_card)
+
+        computer_value = self.card_values[self.computer_card]
+        player_value = self.card_values[self.player_card]
+
+        # Determine if guess is correct
+        is_correct = False
+        if player_guess == "higher" and player_value > computer_value:
+            is_correct = True
+        elif player_guess == "lower" and player_value < computer_value:
+            is_correct = True
+        elif player_guess == "tie" and player_value == computer_value:
+            is_correct = True
+
+        # Calculate score
+        score_added = 0
+        bonus = False
+
+        if is_correct:
+            # Calculate probability of this guess
+            probabilities = self.calculate_probabilities()
+            guess_probability = probabilities.get(player_guess, 0)
+
+            if guess_probability < BONUS_PROBABILITY:  # Less than 10% probability
+                score_added = BONUS_SCORE
+                bonus = True
+                self.bonus_count += 1
+            else:
+                score_added = CORRECT_SCORE
+                bonus = False
+
+            self.player_score += score_added
+
+        return is_correct, score_added, bonus
+
+    def reveal_computer_card(self):
+        """Flip the computer card and wait for the player's guess"""
+        if (self.game_state == "dealing" and
+            self.computer_card is not None and
+            not self.is_revealed(self.computer_card)):
+            self.reveal_card(self.computer_card)
+            self.game_state = "waiting_guess"
+
+    def make_guess(self, player_guess):
+        """Score a guess and show the result banner"""
+        if player_guess not in GUESSES or self.game_state != "waiting_guess":
+            return None
+        is_correct, score_added, bonus = self.check_guess(player_guess)
+        self.show_result = True
+        self.result_info = {
+            "is_correct": is_correct,
+            "score_added": score_added,
+            "bonus": bonus
+        }
+        self.game_state = "revealing"
+        self.result_start_time = self.now()
+        return self.result_info
+
+    def finish_round(self):
+        """Close the result banner and deal the next round or end the game"""
+        if self.game_state == "revealing" and self.show_result:
+            if self.cards_left() >= 2:
+                self.next_round()
+            else:
+                self.game_state = "game_over"
+            self.show_result = False
+
+    def start_new(self):
+        """New game from the start button, with every dialog closed"""
+        self.start_new_game()
+        self.show_result = False
+        self.show_hint_dialog = False
+        self.show_shuffle_dialog = False
+        self.show_instruction_dialog = False
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+
+    def open_hint(self):
+        self.hint_probabilities = self.calculate_probabilities()
+        self.show_hint_dialog = True
+
+    def open_dialog(self, name):
+        setattr(self, DIALOG_FLAGS[name], True)
+
+    def close_dialog(self, name):
+        setattr(self, DIALOG_FLAGS[name], False)
+
+    def input_context(self):
+        """Topmost open dialog, which captures input, or else the game state"""
+        for dialog, flag in TOP_DIALOG_FIRST:
+            if getattr(self, flag):
+                return dialog
+        return self.game_state
+
+    def active_buttons(self):
+        """Buttons that do something right now"""
+        return ACTIVE_BUTTONS.get(self.input_context(), ONLY_GLOBAL_BUTTONS)
+
+    def handle_button_click(self, button_name, context=None):
+        """Handle button click through BUTTON_HANDLERS; clicks without a handler are ignored
+
+        context overrides input_context(), for replaying older logs.
+        """
+        if button_name == "exit":
+            return "exit"
+        if context is None:
+            context = self.input_context()
+        handler = BUTTON_HANDLERS.get((context, button_name))
+        if handler is None:
+            return "continue"
+        handler(self)
+        if self.recorder is not None and button_name != "start_new":  # The new log starts with it
+            self.recorder.record(self, button_name)
+        return "continue"
+
+    def pending_timer(self):
+        """Next timed transition as (name, due time in ms), or None
+
+        The bot waits while a dialog captures input.
+        """
+        if self.game_state == "dealing":
+            return ("reveal", self.deal_start_time + DEAL_REVEAL_DELAY)
+        if self.game_state == "revealing" and self.show_result:
+            return ("result", self.result_start_time + RESULT_DISPLAY_TIME)
+        if self.bot is not None:
+            context = self.input_context()
+            if context == "waiting_guess":
+                return ("bot", self.deal_start_time + DEAL_REVEAL_DELAY + BOT_GUESS_DELAY)
+            if context in ("idle", "game_over"):
+                return ("bot", self.result_start_time + RESULT_DISPLAY_TIME + BOT_RESTART_DELAY)
+        return None
+
+    def run_timer(self, name):
+        """Run the timed transition returned by pending_timer()"""
+        if name == "reveal":
+            self.reveal_computer_card()
+        elif name == "result":
+            self.finish_round()
+        elif name == "bot":
+            self.play_bot()
+        if self.recorder is not None:
+            self.recorder.record(self, name)
+
+    def play_bot(self):
+        """Bot's turn: click its guess, or start the next game, unless a dialog is open"""
+        context = self.input_context()
+        if context == "waiting_guess":
+            self.handle_button_click(self.bot.decide(self.table_view()))
+        elif context in ("idle", "game_over"):
+            self.handle_button_click("start_new")
+
+    def update(self):
+        """Update game state"""
+        # Reveal computer card after 1 second, go to next round after
+        # showing the result for 2 seconds. An instant clock jumps to each
+        # transition instead of waiting, up to the end of the game.
+        pending = self.pending_timer()
+        while pending:
+            if self.clock.instant:
+                self.clock.time = max(self.clock.time, pending[1])
+            elif self.now() <= pending[1]:
+                break
+            self.run_timer(pending[0])
+            if self.pending_timer() == pending or self.game_state == "game_over":
+                break
+            pending = self.pending_timer()
+
+    def step(self, dt):
+        """Fixed-timestep update: advance a ManualClock by dt ms, then update"""
+        self.clock.advance(dt)
+        self.update()
+
+# Button dispatch: (input context, button) -> handler(engine), the context
+# being GameEngine.input_context(). Handlers call engine methods by name so
+# subclass overrides apply.
+BUTTON_HANDLERS = {
+    ("idle", "start_new"): methodcaller("start_new"),
+    ("game_over", "start_new"): methodcaller("start_new"),
+    ("waiting_guess", "instruction"): methodcaller("open_dialog", "instruction"),
+    ("waiting_guess", "hint"): methodcaller("open_hint"),
+    ("waiting_guess", "shuffle"): methodcaller("shuffle_deck"),
+    ("instruction", "instruction_ok"): methodcaller("close_dialog", "instruction"),
+    ("hint", "hint_ok"): methodcaller("close_dialog", "hint"),
+    ("shuffle", "shuffle_ok"): methodcaller("close_dialog", "shuffle"),
+}
+BUTTON_HANDLERS.update({("waiting_guess", guess): methodcaller("make_guess", guess) for guess in GUESSES})
+
+TOP_DIALOG_FIRST = tuple(reversed(DIALOG_FLAGS.items()))
+
+def buttons_by_context():
+    """Active button set of every input context that has handlers"""
+    buttons = {}
+    for context, button in BUTTON_HANDLERS:
+        buttons.setdefault(context, set(GLOBAL_BUTTONS)).add(button)
+    return {context: frozenset(names) for context, names in buttons.items()}
+
+ACTIVE_BUTTONS = buttons_by_context()
+ONLY_GLOBAL_BUTTONS = frozenset(GLOBAL_BUTTONS)
@@ -0,0 +1,128 @@
+"""Offscreen frame export of recorded Guess High Low games.
+
+Replays GuessHighLow_replay logs through a variant's PokerGame drawing
+into an offscreen Surface: no window, no display flip and no frame-rate
+cap, so frames come out as fast as the CPU draws them. Frame k shows the
+game at k / fps seconds of game time with every recorded click and timed
+transition up to then applied, so clips play back at the recorded pace.
+Confetti is seeded from the game seed, so exports are reproducible.
+
+Frames go out as a PNG sequence (visual regression baselines) or a raw
+RGB24 stream (video encoders), one set of files per game:
+    <output>/<log file stem>_<game index>_<frame>.png
+    <output>/<log file stem>_<game index>.rgb
+A raw stream can also go to stdout, e.g.
+    python GuessHighLow_export.py games.ghlr --format rgb --output - |
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 600x800 -r 30 -i - clip.mp4
+Games are rendered in parallel worker processes otherwise.
+
+Usage:
+    python GuessHighLow_export.py recordings/*.ghlr --output frames --fps 30
+"""
+import argparse
+import contextlib
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Its banner would land in a stdout stream
+
+import pygame
+
+from GuessHighLow_bench import VARIANTS
+from GuessHighLow_engine import GameRng, ManualClock
+from GuessHighLow_replay import apply_step, begin_replay, read_logs
+
+FORMATS = ("png", "rgb")
+TAIL_MS = 2000            # Game over screen kept after the last recorded step
+
+
+def game_frames(module, log, fps, tail_ms=TAIL_MS):
+    """Replay log offscreen, yielding the screen Surface at every frame time"""
+    screen = module.open_offscreen()
+    game = module.PokerGame(clock=ManualClock())
+    game.effects_rng = GameRng(log.seed)
+    begin_replay(log, game)
+
+    steps = log.steps
+    end_ms = (steps[-1][0] if steps else 0) + tail_ms
+    index = 0
+    for frame in range(end_ms * fps // 1000 + 1):
+        time_ms = frame * 1000 // fps
+        while index < len(steps) and steps[index][0] <= time_ms:
+            game.clock.time, step = steps[index]
+            apply_step(game, step, log.version)
+            index += 1
+        game.clock.time = time_ms
+        game.render()
+        yield screen
+
+
+def export_game(variant, log, name, fps, fmt, output, tail_ms=TAIL_MS):
+    """Worker: write one game's frames, return the number of frames"""
+    module = importlib.import_module(VARIANTS[variant])
+    frames = 0
+    stdout = sys.stdout.buffer
+    with contextlib.ExitStack() as stack:
+        devnull = stack.enter_context(open(os.devnull, "w"))
+        stack.enter_context(contextlib.redirect_stdout(devnull))  # Variants' debug prints
+        if fmt == "rgb":
+            stream = stdout if output == "-" else stack.enter_context(
+                open(os.path.join(output, f"{name}.rgb"), "wb"))
+        for surface in game_frames(module, log, fps, tail_ms):
+            if fmt == "png":
+                pygame.image.save(surface, os.path.join(output, f"{name}_{frames:05d}.png"))
+            else:
+                stream.write(pygame.image.tobytes(surface, "RGB"))
+            frames += 1
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export recorded Guess High Low games as frames")
+    parser.add_argument("paths", nargs="+", help="replay log files")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="rc")
+    parser.add_argument("--fps", type=int, default=30, help="frames per second of game time")
+    parser.add_argument("--format", choices=FORMATS, default="png",
+                        help="png: one image per frame; rgb: raw RGB24 stream per game")
+    parser.add_argument("--output", default="frames", help="output directory, or - for an rgb stream on stdout")
+    parser.add_argument("--tail", type=float, default=TAIL_MS / 1000,
+                        help="seconds of game over screen after the last step")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    if args.output == "-" and args.format != "rgb":
+        parser.error("only --format rgb can stream to stdout")
+
+    games = []
+    for path in args.paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for index, log in enumerate(read_logs(path)):
+            games.append((log, f"{stem}_{index:03d}"))
+    tail_ms = int(args.tail * 1000)
+
+    start = time.perf_counter()
+    frames = 0
+    if args.output == "-":
+        # One stream: render in order in this process
+        for log, name in games:
+            frames += export_game(args.variant, log, name, args.fps, args.format, "-", tail_ms)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(export_game, args.variant, log, name, args.fps, args.format,
+                                   args.output, tail_ms) for log, name in games]
+            for future in as_completed(futures):
+                frames += future.result()
+    elapsed = time.perf_counter() - start
+
+    rate = frames / elapsed if elapsed > 0 else 0
+    print(f"{frames:,} frames of {len(games)} games in {elapsed:.1f} s ({rate:,.0f} frames/s)",
+          file=sys.stderr if args.output == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
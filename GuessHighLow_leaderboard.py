@@ -0,0 +1,278 @@
+"""Persistent SQLite leaderboard for Guess High Low.
+
+All database work runs on one background thread that owns the
+connection. Callers queue scores and queries and get a Future back, so
+the render loop never waits on disk. Queued scores are written in one
+transaction per batch; a batch is flushed at once when someone waits on a
+result (the game-over rank), otherwise after a short delay so bulk
+writes share a commit.
+
+Ranks come from score_counts, one row per distinct score with the number
+of games that scored it, kept up to date in the same transaction as the
+inserts. A rank is then a sum over at most a few hundred rows, however
+many games are stored. Top-N, per-day best and a player's best are
+answered from indexes on scores.
+
+Usage:
+    python GuessHighLow_leaderboard.py leaderboard.db --top 10
+    python GuessHighLow_leaderboard.py bench.db --fill 10000000   # scale test
+"""
+import argparse
+import getpass
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from GuessHighLow_engine import GameRng
+
+DEFAULT_PATH = "leaderboard.db"
+FLUSH_INTERVAL = 0.25     # Seconds a write waits for more writes to share its transaction
+BATCH_SIZE = 10_000       # Rows per transaction at most
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    bonuses INTEGER NOT NULL,
+    played_at INTEGER NOT NULL,      -- Unix time
+    day TEXT NOT NULL                -- Local date, YYYY-MM-DD
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, played_at);
+CREATE INDEX IF NOT EXISTS scores_by_day ON scores (day, score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC);
+CREATE TABLE IF NOT EXISTS score_counts (
+    score INTEGER PRIMARY KEY,
+    games INTEGER NOT NULL
+);
+"""
+
+
+def default_player():
+    try:
+        return getpass.getuser()
+    except Exception:  # No login name, e.g. in some containers
+        return "player"
+
+
+def score_row(player, score, bonuses, played_at=None):
+    played_at = int(time.time() if played_at is None else played_at)
+    return (player, score, bonuses, played_at, time.strftime("%Y-%m-%d", time.localtime(played_at)))
+
+
+# Queries, run on the leaderboard thread
+def query_rank(connection, score):
+    """(rank, total games) of a score; ties share the best rank"""
+    higher, total = connection.execute(
+        "SELECT COALESCE(SUM(CASE WHEN score > ? THEN games END), 0), COALESCE(SUM(games), 0) "
+        "FROM score_counts", (score,)).fetchone()
+    return higher + 1, total
+
+
+def query_top(connection, count):
+    return connection.execute(
+        "SELECT player, score, bonuses, played_at FROM scores "
+        "ORDER BY score DESC, played_at LIMIT ?", (count,)).fetchall()
+
+
+def query_day_best(connection, day):
+    return connection.execute(
+        "SELECT player, score, bonuses, played_at FROM scores "
+        "WHERE day = ? ORDER BY score DESC LIMIT 1", (day,)).fetchone()
+
+
+def query_player(connection, player):
+    """(best score, its rank, total games), or None for an unknown player"""
+    row = connection.execute(
+        "SELECT score FROM scores WHERE player = ? ORDER BY score DESC LIMIT 1", (player,)).fetchone()
+    if row is None:
+        return None
+    return (row[0],) + query_rank(connection, row[0])
+
+
+class Leaderboard:
+    """SQLite leaderboard served by a background thread"""
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.requests = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="leaderboard", daemon=True)
+        self.thread.start()
+
+    # Called from any thread
+    def submit(self, player, score, bonuses, played_at=None):
+        """Queue a finished game; the Future resolves to its (rank, total games)"""
+        future = Future()
+        self.requests.put(("write", [score_row(player, score, bonuses, played_at)], future))
+        return future
+
+    def record_many(self, rows):
+        """Queue (player, score, bonuses, played_at) tuples without waiting for ranks"""
+        future = Future()
+        self.requests.put(("write", [score_row(*row) for row in rows], future))
+        return future
+
+    def query(self, function, *args):
+        future = Future()
+        self.requests.put(("query", (function, args), future))
+        return future
+
+    def rank(self, score):
+        return self.query(query_rank, score)
+
+    def top(self, count=10):
+        return self.query(query_top, count)
+
+    def day_best(self, day=None):
+        return self.query(query_day_best, day or time.strftime("%Y-%m-%d"))
+
+    def player(self, player):
+        return self.query(query_player, player)
+
+    def close(self):
+        """Write everything still queued and stop the thread"""
+        self.requests.put(None)
+        self.thread.join()
+
+    # Leaderboard thread
+    def run(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; commits skip fsync
+        connection.executescript(SCHEMA)
+        running = True
+        while running:
+            batch = self.next_batch()
+            if batch[-1] is None:
+                batch.pop()
+                running = False
+            self.process(connection, batch)
+        connection.close()
+
+    def next_batch(self):
+        """Block for a request, then gather more until someone waits on a result"""
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.flush_interval
+        rows = 0
+        while batch[-1] is not None:
+            kind, payload, future = batch[-1]
+            if kind == "write":
+                rows += len(payload)
+            if kind == "query" or len(payload) == 1 or rows >= self.batch_size:
+                # A query or a single game: the caller waits for an answer
+                # (bulk writes only wait for the commit), drain what is queued
+                try:
+                    while rows < self.batch_size:
+                        batch.append(self.requests.get_nowait())
+                        if batch[-1] is None:
+                            break
+                        if batch[-1][0] == "write":
+                            rows += len(batch[-1][1])
+                except queue.Empty:
+                    pass
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def process(self, connection, batch):
+        writes = [request for request in batch if request[0] == "write"]
+        if writes:
+            rows = [row for _, payload, _ in writes for row in payload]
+            counts = Counter(row[1] for row in rows)
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO scores (player, score, bonuses, played_at, day) VALUES (?, ?, ?, ?, ?)", rows)
+                    connection.executemany(
+                        "INSERT INTO score_counts (score, games) VALUES (?, ?) "
+                        "ON CONFLICT (score) DO UPDATE SET games = games + excluded.games", counts.items())
+            except sqlite3.Error as error:
+                for _, _, future in writes:
+                    future.set_exception(error)
+                batch = [request for request in batch if request[0] == "query"]
+
+        for kind, payload, future in batch:
+            if kind == "write" and future.set_running_or_notify_cancel():
+                if len(payload) == 1:
+                    future.set_result(query_rank(connection, payload[0][1]))
+                else:
+                    future.set_result(len(payload))
+            elif kind == "query" and future.set_running_or_notify_cancel():
+                function, args = payload
+                try:
+                    future.set_result(function(connection, *args))
+                except sqlite3.Error as error:
+                    future.set_exception(error)
+
+
+def fill(leaderboard, count, seed=None):
+    """Queue count synthetic games spread over the last year"""
+    rng = GameRng(seed)
+    now = int(time.time())
+    players = [f"player{index}" for index in range(1000)]
+    futures = []
+    for start in range(0, count, BATCH_SIZE):
+        rows = [(rng.choice(players), sum(rng.randint(0, 12) for _ in range(4)) * 10,
+                 rng.randint(0, 3), now - rng.randint(0, 365 * 86400))
+                for _ in range(min(BATCH_SIZE, count - start))]
+        futures.append(leaderboard.record_many(rows))
+    for future in futures:
+        future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guess High Low leaderboard")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help="SQLite database file")
+    parser.add_argument("--top", type=int, default=10, help="show the N best games")
+    parser.add_argument("--day", help="best game of a day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--player", help="best score and rank of a player")
+    parser.add_argument("--fill", type=int, metavar="N", help="add N synthetic games (scale testing)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    leaderboard = Leaderboard(args.path)
+    if args.fill:
+        start = time.perf_counter()
+        fill(leaderboard, args.fill, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"Added {args.fill:,} games in {elapsed:.1f} s ({args.fill / elapsed:,.0f} rows/s)")
+
+    def timed(future):
+        start = time.perf_counter()
+        result = future.result()
+        return result, (time.perf_counter() - start) * 1000
+
+    top, top_ms = timed(leaderboard.top(args.top))
+    print(f"Top {args.top} ({top_ms:.2f} ms):")
+    for place, (player, score, bonuses, played_at) in enumerate(top, 1):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(played_at))
+        print(f"{place:>4}. {score:>5}  {bonuses} bonus  {player:<16} {when}")
+
+    best, day_ms = timed(leaderboard.day_best(args.day))
+    if best:
+        print(f"Best of the day: {best[1]} by {best[0]} ({day_ms:.2f} ms)")
+    if args.player:
+        result, player_ms = timed(leaderboard.player(args.player))
+        if result:
+            score, rank, total = result
+            print(f"{args.player}: best {score}, rank {rank:,} of {total:,} ({player_ms:.2f} ms)")
+        else:
+            print(f"{args.player}: no games")
+    rank, rank_ms = timed(leaderboard.rank(300))
+    print(f"Rank of a 300-point game: {rank[0]:,} of {rank[1]:,} ({rank_ms:.2f} ms)")
+    leaderboard.close()
+
+
+if __name__ == "__main__":
+    main()
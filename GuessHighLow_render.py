@@ -0,0 +1,241 @@
+"""Rendering helpers shared by the pygame frontends."""
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import pygame
+
+
+# Shared resources
+class ResourcePool:
+    """Named assets created on first use and shared by every game instance
+
+    Each name is registered with a loader; nothing is loaded, and no pygame
+    subsystem is initialized, until the asset is first looked up.
+    """
+
+    def __init__(self):
+        self.loaders = {}
+        self.items = {}
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def __getitem__(self, name):
+        item = self.items.get(name)
+        if item is None:
+            item = self.items[name] = self.loaders[name]()
+        return item
+
+    def loaded(self):
+        """Names of the assets loaded so far"""
+        return list(self.items)
+
+    def clear(self):
+        """Drop loaded assets; they are reloaded on next use"""
+        self.items.clear()
+
+
+def load_fonts(sizes):
+    """Default font at each named size, initializing only the font subsystem"""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return {name: pygame.font.Font(None, size) for name, size in sizes.items()}
+
+
+# Rendered text cache
+class TextCache:
+    """Bounded LRU cache of font.render() surfaces"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        """Return the surface for text, rendering it only on a miss"""
+        key = (font, text, antialias, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # Evict least recently used
+        return surface
+
+    def clear(self):
+        """Drop all cached surfaces and reset counters"""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Card sprite atlas
+class CardAtlas:
+    """Card faces and the card back pre-rendered into one surface
+
+    Slots are rendered lazily the first time a card is drawn, so drawing a
+    card is a single blit from a sub-rect of the atlas.
+    """
+
+    def __init__(self, card_size, slots, render_card, columns=11):
+        self.card_size = card_size
+        self.slots = slots
+        self.columns = columns
+        self.render_card = render_card  # render_card(surface, card, rect); card None is the back
+        self.surface = None
+        self.areas = {}
+
+    def create_surface(self):
+        rows = (self.slots + self.columns - 1) // self.columns
+        width, height = self.card_size
+        surface = pygame.Surface((self.columns * width, rows * height))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def area(self, key, card=None):
+        """Atlas sub-rect for key, rendering the card into a free slot on first use"""
+        area = self.areas.get(key)
+        if area is None:
+            if self.surface is None:
+                self.surface = self.create_surface()
+            index = len(self.areas)
+            if index >= self.slots:
+                raise ValueError(f"Card atlas is full ({self.slots} slots)")
+            width, height = self.card_size
+            area = pygame.Rect((index % self.columns) * width, (index // self.columns) * height,
+                               width, height)
+            self.render_card(self.surface, card, area)
+            self.areas[key] = area
+        return area
+
+    def prerender(self, cards):
+        """Render (key, card) pairs up front instead of on first draw"""
+        for key, card in cards:
+            self.area(key, card)
+
+    def blit(self, target, key, card, position):
+        """Draw one card from the atlas"""
+        area = self.area(key, card)
+        target.blit(self.surface, position, area)
+
+
+# Hit testing
+class HitGrid:
+    """Spatial hash of named rects: a point is tested only against the rects
+    overlapping its grid cell, however many controls the screen has"""
+
+    def __init__(self, rects, cell_size=100):
+        self.cell_size = cell_size
+        self.cells = {}
+        for name, rect in rects.items():
+            for column in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+                for row in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+                    self.cells.setdefault((column, row), []).append((name, rect))
+
+    def hit(self, pos, active):
+        """Name of the rect under pos among the names in active, or None"""
+        cell = (pos[0] // self.cell_size, pos[1] // self.cell_size)
+        for name, rect in self.cells.get(cell, ()):
+            if name in active and rect.collidepoint(pos):
+                return name
+        return None
+
+
+# Frame-time profiler
+class FrameProfiler:
+    """Per-frame section timings with an on-screen overlay and histogram export"""
+
+    SECTIONS = ("events", "update", "draw", "flip")
+    BUCKET_MS = 0.5        # Histogram bucket width
+    MAX_BUCKETS = 200      # Last bucket collects frames of 100 ms and more
+
+    def __init__(self, window=240, visible=False):
+        self.visible = visible
+        self.frame_starts = deque(maxlen=window)
+        self.frame_times = deque(maxlen=window)                # Busy time per frame, ms
+        self.section_times = {name: deque(maxlen=window) for name in self.SECTIONS}
+        self.current = {}
+        self.histogram = [0] * self.MAX_BUCKETS
+        self.section_totals = dict.fromkeys(self.SECTIONS, 0.0)
+        self.frames = 0
+
+    @contextmanager
+    def measure(self, section):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[section] = self.current.get(section, 0.0) + (time.perf_counter() - start) * 1000
+
+    def end_frame(self):
+        """Close the current frame and fold its timings into the statistics"""
+        self.frame_starts.append(time.perf_counter())
+        frame_time = 0.0
+        for name in self.SECTIONS:
+            elapsed = self.current.get(name, 0.0)
+            self.section_times[name].append(elapsed)
+            self.section_totals[name] += elapsed
+            frame_time += elapsed
+        self.current = {}
+        self.frame_times.append(frame_time)
+        self.histogram[min(int(frame_time / self.BUCKET_MS), self.MAX_BUCKETS - 1)] += 1
+        self.frames += 1
+
+    def fps(self):
+        if len(self.frame_starts) < 2:
+            return 0.0
+        span = self.frame_starts[-1] - self.frame_starts[0]
+        return (len(self.frame_starts) - 1) / span if span > 0 else 0.0
+
+    def percentile(self, fraction):
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def overlay_lines(self):
+        lines = [f"FPS {self.fps():5.1f}",
+                 f"p95 {self.percentile(0.95):6.2f} ms",
+                 f"p99 {self.percentile(0.99):6.2f} ms"]
+        for name in self.SECTIONS:
+            times = self.section_times[name]
+            mean = sum(times) / len(times) if times else 0.0
+            lines.append(f"{name:<6} {mean:6.2f} ms")
+        return lines
+
+    def draw(self, surface, font, position=(400, 10)):
+        """Draw the overlay box and return its rect"""
+        # Rendered directly: the numbers change every frame and would only churn a TextCache
+        lines = self.overlay_lines()
+        line_height = font.get_linesize()
+        rect = pygame.Rect(position, (190, line_height * len(lines) + 10))
+        surface.fill((0, 0, 0), rect)
+        for index, line in enumerate(lines):
+            text = font.render(line, True, (0, 255, 0))
+            surface.blit(text, (rect.x + 5, rect.y + 5 + index * line_height))
+        return rect
+
+    def write_histogram(self, path):
+        """Write the frame-time histogram and per-section means as CSV"""
+        with open(path, "w") as f:
+            f.write("bucket_start_ms,bucket_end_ms,frames\n")
+            for index, count in enumerate(self.histogram):
+                if count:
+                    end = "" if index == self.MAX_BUCKETS - 1 else f"{(index + 1) * self.BUCKET_MS:.1f}"
+                    f.write(f"{index * self.BUCKET_MS:.1f},{end},{count}\n")
+            f.write("\nsection,mean_ms\n")
+            for name in self.SECTIONS:
+                mean = self.section_totals[name] / self.frames if self.frames else 0.0
+                f.write(f"{name},{mean:.4f}\n")
@@ -0,0 +1,279 @@
+"""Compact deterministic replay logs for Guess High Low.
+
+A log holds the game's shuffle seed and every button click and timed
+transition (dealer reveal, end of result banner) with its time since the
+start of the game. Because the engine shuffles only from the game seed,
+applying the same steps in order rebuilds every state transition of the
+original game, so replay runs at full speed without waiting on timers.
+
+Log layout (little endian):
+    magic "GHLR", version byte, 256-bit game seed (64-bit before version 4),
+    16-bit deck count (version 2 on),
+    varint step count, then per step a varint time delta in ms and a step code,
+    varint final score as recorded.
+A file may hold any number of logs back to back.
+
+Version 3 logs come from the state-table dispatch, where an open dialog
+captures every click and clicks that do nothing are not recorded. Version 1
+and 2 logs were recorded when each button only checked its own game state
+or dialog; they replay with that dispatch so old recordings still reach
+their recorded scores. Version 4 only widened the game seed.
+
+Usage:
+    python GuessHighLow_replay.py recordings/*.ghlr
+"""
+import argparse
+import struct
+import sys
+import time
+
+from GuessHighLow_engine import DIALOG_FLAGS, SEED_BITS, GameEngine, ManualClock
+
+MAGIC = b"GHLR"
+VERSION = 4
+SUPPORTED_VERSIONS = (1, 2, 3, 4)
+LEGACY_DISPATCH_VERSIONS = (1, 2)  # Recorded before dialogs captured input
+PREFIX = struct.Struct("<4sB")
+HEADER = struct.Struct(f"<4sB{SEED_BITS // 8}sH")
+HEADER_V2 = struct.Struct("<4sBQH")  # Versions 2 and 3: 64-bit seeds
+HEADER_V1 = struct.Struct("<4sBQ")  # Single-deck games only
+
+# Step codes: button clicks, then timed transitions
+STEPS = ("start_new", "instruction", "hint", "shuffle", "instruction_ok", "hint_ok",
+         "shuffle_ok", "higher", "lower", "tie", "reveal", "result")
+STEP_CODES = {name: code for code, name in enumerate(STEPS)}
+TIMERS = ("reveal", "result")
+
+# Dialog closed by each OK button, for legacy dispatch
+OK_BUTTON_DIALOGS = {f"{dialog}_ok": dialog for dialog in DIALOG_FLAGS}
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class ReplayLog:
+    """One recorded game: seed, shoe size, (time_ms, step) list and the recorded final score
+
+    version is the dispatch the steps were recorded with; a log read from
+    an older file keeps it and its 64-bit seed when written back (version 1
+    as version 2, which only adds the deck count).
+    """
+
+    def __init__(self, seed, steps=None, final_score=0, decks=1, version=VERSION):
+        self.seed = seed
+        self.decks = decks
+        self.steps = steps if steps is not None else []
+        self.final_score = final_score
+        self.version = version
+
+    def to_bytes(self):
+        version = max(self.version, 2)
+        if version >= 4:
+            out = bytearray(HEADER.pack(MAGIC, version, self.seed.to_bytes(SEED_BITS // 8, "little"), self.decks))
+        else:
+            out = bytearray(HEADER_V2.pack(MAGIC, version, self.seed, self.decks))
+        write_varint(out, len(self.steps))
+        previous = 0
+        for time_ms, step in self.steps:
+            write_varint(out, max(0, time_ms - previous))
+            out.append(STEP_CODES[step])
+            previous = max(previous, time_ms)
+        write_varint(out, self.final_score)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """Decode the log at offset, return (log, offset after it)
+
+        Raises ValueError for a truncated log or one that is not a replay log.
+        """
+        try:
+            return cls._from_bytes(data, offset)
+        except (IndexError, struct.error) as exc:
+            raise ValueError("Truncated replay log") from exc
+
+    @classmethod
+    def _from_bytes(cls, data, offset):
+        magic, version = PREFIX.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError("Not a Guess High Low replay log")
+        if version == 1:
+            seed = HEADER_V1.unpack_from(data, offset)[2]
+            decks = 1
+            offset += HEADER_V1.size
+        elif version in (2, 3):
+            seed, decks = HEADER_V2.unpack_from(data, offset)[2:]
+            offset += HEADER_V2.size
+        elif version in SUPPORTED_VERSIONS:
+            seed, decks = HEADER.unpack_from(data, offset)[2:]
+            seed = int.from_bytes(seed, "little")
+            offset += HEADER.size
+        else:
+            raise ValueError(f"Unsupported replay log version {version}")
+        count, offset = read_varint(data, offset)
+        steps = []
+        time_ms = 0
+        for _ in range(count):
+            delta, offset = read_varint(data, offset)
+            time_ms += delta
+            code = data[offset]
+            if code >= len(STEPS):
+                raise ValueError(f"Unknown replay step code {code}")
+            steps.append((time_ms, STEPS[code]))
+            offset += 1
+        final_score, offset = read_varint(data, offset)
+        return cls(seed, steps, final_score, decks, version), offset
+
+
+def read_logs(path):
+    """Yield the logs stored in a file, in order
+
+    Raises ValueError at the first log that cannot be decoded; the logs
+    before it have been yielded by then.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        log, offset = ReplayLog.from_bytes(data, offset)
+        yield log
+
+
+class ReplayRecorder:
+    """Engine hook that records every game into a ReplayLog
+
+    Set as engine.recorder; the engine calls start_game() when a new game
+    starts and record() for each click and timed transition. Finished logs
+    are appended to path, if given, and kept in self.logs otherwise.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.logs = []
+        self.current = None
+        self.start_time = 0
+
+    def start_game(self, engine):
+        self.finish(engine)
+        self.current = ReplayLog(engine.game_seed, decks=engine.decks)
+        self.start_time = engine.now()
+
+    def record(self, engine, step):
+        if self.current is not None and step in STEP_CODES:
+            self.current.steps.append((engine.now() - self.start_time, step))
+            self.current.final_score = engine.player_score
+
+    def finish(self, engine):
+        """Close the current log and store it"""
+        if self.current is None:
+            return
+        if self.path:
+            with open(self.path, "ab") as f:
+                f.write(self.current.to_bytes())
+        else:
+            self.logs.append(self.current)
+        self.current = None
+
+
+class ReplayEngine(GameEngine):
+    """Engine whose clock is driven by the replayed timestamps"""
+
+    def __init__(self):
+        super().__init__(clock=ManualClock())
+
+
+def begin_replay(log, engine):
+    """Start the recorded game on an engine with a ManualClock, before its first step"""
+    engine.clock.time = 0
+    if engine.decks != log.decks:
+        engine.set_decks(log.decks)
+    engine.start_new_game(log.seed)
+    engine.show_result = False
+    engine.show_hint_dialog = False
+    engine.show_shuffle_dialog = False
+    engine.show_instruction_dialog = False
+
+
+def legacy_context(engine, button_name):
+    """Input context of a click in a version 1 or 2 log
+
+    Dialogs captured nothing then: an OK button only needed its own dialog
+    open, every other button only looked at the game state.
+    """
+    dialog = OK_BUTTON_DIALOGS.get(button_name)
+    if dialog is None:
+        return engine.game_state
+    return dialog if getattr(engine, DIALOG_FLAGS[dialog]) else None
+
+
+def apply_step(engine, step, version=VERSION):
+    """Replay one recorded click or timed transition of a log of the given version"""
+    if step in TIMERS:
+        engine.run_timer(step)
+    elif version in LEGACY_DISPATCH_VERSIONS:
+        engine.handle_button_click(step, legacy_context(engine, step))
+    else:
+        engine.handle_button_click(step)
+
+
+def replay(log, engine=None):
+    """Rebuild the recorded game at full speed and return the engine"""
+    engine = engine or ReplayEngine()
+    begin_replay(log, engine)
+    for time_ms, step in log.steps:
+        engine.clock.time = time_ms
+        apply_step(engine, step, log.version)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Guess High Low games")
+    parser.add_argument("paths", nargs="+", help="replay log files")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every game")
+    args = parser.parse_args()
+
+    games = mismatches = bad_files = 0
+    engine = ReplayEngine()
+    start = time.perf_counter()
+    for path in args.paths:
+        index = 0
+        try:
+            for log in read_logs(path):
+                replay(log, engine)
+                games += 1
+                if engine.player_score != log.final_score:
+                    mismatches += 1
+                    print(f"{path}#{index}: replayed score {engine.player_score}, "
+                          f"recorded {log.final_score}")
+                elif args.verbose:
+                    print(f"{path}#{index}: seed {log.seed} score {engine.player_score} ({engine.game_state})")
+                index += 1
+        except (OSError, ValueError) as exc:
+            bad_files += 1
+            print(f"{path}#{index}: {exc}; rest of the file skipped")
+    elapsed = time.perf_counter() - start
+
+    rate = games / elapsed if elapsed > 0 else 0
+    print(f"{games} games replayed in {elapsed:.2f} s ({rate:,.0f} games/s), {mismatches} mismatches, "
+          f"{bad_files} unreadable files")
+    sys.exit(1 if mismatches or bad_files else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Asyncio server hosting many independent Guess High Low games.
+
+Every TCP connection owns one session with its own GameEngine, so dealing,
+probabilities and scoring follow exactly the rules of the game window.
+The dealer reveal and result delays are asyncio timers armed from
+GameEngine.pending_timer(); no session runs a frame loop. Sessions that
+send nothing for longer than the idle timeout are evicted.
+
+Protocol: newline-delimited JSON over TCP. The client sends
+    {"action": "start_new"}      any button name, or "state"
+and receives the session state after each action and each timed
+transition (dealer reveal, end of result banner):
+    {"event": "reveal", "state": "waiting_guess", "score": 20,
+     "cards_left": 36, "computer": 17, "player": null, ...}
+Cards are codes into GuessHighLow_engine.CARDS; face-down cards are null.
+{"action": "snapshot"} returns the game as a base64 GuessHighLow_snapshot,
+and {"action": "restore", "snapshot": ...} resumes it in any session, on
+this server or another one started with the same --snapshot-key.
+Snapshots are HMAC-signed with that key, so clients cannot forge a game or
+its score; without a key each server signs with a random one of its own.
+
+Usage:
+    python GuessHighLow_server.py --port 8765 --snapshot-key SECRET
+    python GuessHighLow_server.py --load 2000 --duration 30   # loopback load test
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from GuessHighLow_engine import DECK_SIZE, GameEngine, GameRng, GUESSES
+from GuessHighLow_snapshot import STREAM_STATE, restore, signed, snapshot, verified
+
+BUTTONS = ("start_new", "exit", "instruction", "hint", "shuffle",
+           "instruction_ok", "hint_ok", "shuffle_ok") + GUESSES
+IDLE_TIMEOUT = 300        # Seconds without a client message before a session is evicted
+MAX_LINE = 1024           # Longest accepted request line, plus room for a snapshot of a multi-deck shoe
+ENCODER = json.JSONEncoder(separators=(",", ":"))  # Reused: json.dumps builds one per call
+
+
+class Session(asyncio.Protocol):
+    """One connected player: engine, connection and the armed timer"""
+    __slots__ = ("server", "session_id", "engine", "transport", "buffer",
+                 "timer", "armed", "last_active")
+
+    def __init__(self, server):
+        self.server = server
+        self.session_id = None
+        self.engine = None
+        self.transport = None
+        self.buffer = b""
+        self.timer = None       # asyncio.TimerHandle of the pending transition
+        self.armed = None       # (name, due) the timer was armed for
+        self.last_active = time.monotonic()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.open_session(self)
+
+    def data_received(self, data):
+        self.last_active = time.monotonic()
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        for line in lines:
+            if line.strip() and not self.server.handle_line(self, line):
+                self.transport.close()
+                return
+        if len(self.buffer) > self.server.max_line:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.server.close_session(self)
+
+    def write(self, message):
+        self.transport.write(ENCODER.encode(message).encode() + b"\n")
+
+
+def session_state(engine, event):
+    """JSON-ready view of what the game window would show"""
+    computer = engine.computer_card
+    player = engine.player_card
+    state = {
+        "event": event,
+        "state": engine.game_state,
+        "score": engine.player_score,
+        "cards_left": engine.cards_left(),
+        "computer": computer if computer is not None and engine.is_revealed(computer) else None,
+        "player": player if player is not None and engine.is_revealed(player) else None,
+    }
+    if engine.show_result:
+        state["result"] = engine.result_info
+    if engine.show_hint_dialog:
+        state["hint"] = engine.hint_probabilities
+    if engine.show_shuffle_dialog:
+        state["shuffle"] = engine.shuffle_info
+    if engine.show_instruction_dialog:
+        state["instruction"] = True
+    return state
+
+
+class GameServer:
+    """Runs sessions on the event loop and evicts idle ones"""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, seed=None, decks=1, snapshot_key=None):
+        self.idle_timeout = idle_timeout
+        self.decks = decks
+        self.snapshot_key = snapshot_key if snapshot_key is not None else os.urandom(32)
+        # Base64 of 2-byte card codes, and of the shuffle stream state snapshots of long games carry
+        self.max_line = MAX_LINE + 4 * DECK_SIZE * (decks - 1) + 4 * STREAM_STATE.size // 3
+        self.rng = GameRng(seed)  # Shared by all engines to draw their game seeds
+        self.sessions = {}
+        self.next_id = 0
+        self.evicted = 0
+
+    async def start(self, host="127.0.0.1", port=8765):
+        loop = asyncio.get_running_loop()
+        listener = await loop.create_server(lambda: Session(self), host, port, backlog=4096)
+        loop.create_task(self.evict_idle())
+        return listener
+
+    def open_session(self, session):
+        self.next_id += 1
+        session.session_id = self.next_id
+        session.engine = GameEngine(rng=self.rng, decks=self.decks)
+        self.sessions[session.session_id] = session
+
+    def close_session(self, session):
+        if self.sessions.pop(session.session_id, None) is None:
+            return
+        if session.timer is not None:
+            session.timer.cancel()
+            session.timer = None
+        session.transport.close()
+
+    def arm_timer(self, session):
+        """Schedule the engine's next timed transition, if it changed
+
+        A timer that fired without moving the game on is not re-armed.
+        """
+        pending = session.engine.pending_timer()
+        if pending == session.armed:
+            return
+        if session.timer is not None:
+            session.timer.cancel()
+            session.timer = None
+        session.armed = pending
+        if pending:
+            name, due = pending
+            delay = session.engine.clock.real_ms(max(0, due - session.engine.now())) / 1000
+            session.timer = asyncio.get_running_loop().call_later(delay, self.run_timer, session, name)
+
+    def run_timer(self, session, name):
+        session.timer = None
+        session.engine.run_timer(name)
+        session.write(session_state(session.engine, name))
+        self.arm_timer(session)
+
+    def handle_line(self, session, line):
+        """Apply one request line, return False when the client exits"""
+        try:
+            request = json.loads(line)
+            action = request["action"]
+        except (ValueError, KeyError, TypeError):
+            session.write({"error": "expected {\"action\": ...}"})
+            return True
+
+        if action in BUTTONS:
+            if session.engine.handle_button_click(action) == "exit":
+                return False
+            self.arm_timer(session)
+        elif action == "snapshot":
+            data = base64.b64encode(signed(snapshot(session.engine), self.snapshot_key)).decode()
+            session.write({"event": action, "snapshot": data})
+            return True
+        elif action == "restore":
+            try:
+                # Into a fresh engine, so a bad snapshot leaves the game untouched
+                data = verified(base64.b64decode(request["snapshot"], validate=True), self.snapshot_key)
+                engine = restore(data, GameEngine(rng=self.rng))
+            except (KeyError, TypeError, ValueError):
+                session.write({"event": action, "error": "invalid snapshot"})
+                return True
+            session.engine = engine
+            self.arm_timer(session)
+        elif action != "state":
+            session.write({"event": action, "error": "unknown action"})
+            return True
+        session.write(session_state(session.engine, action))
+        return True
+
+    async def evict_idle(self):
+        """Close sessions idle for longer than idle_timeout"""
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            cutoff = time.monotonic() - self.idle_timeout
+            for session in [s for s in self.sessions.values() if s.last_active < cutoff]:
+                self.close_session(session)
+                self.evicted += 1
+
+
+# Loopback load test
+async def play_client(host, port, start_delay, deadline, latencies):
+    """Play full rounds until the deadline, timing every request/response pair"""
+    await asyncio.sleep(start_delay)  # Stagger clients so their timers do not all fire together
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def receive():
+        return json.loads(await reader.readline())
+
+    async def request(action):
+        start = time.perf_counter()
+        writer.write(json.dumps({"action": action}).encode() + b"\n")
+        while True:
+            message = await receive()
+            if message.get("event") == action:
+                latencies.append(time.perf_counter() - start)
+                return message
+
+    state = await request("start_new")
+    while time.monotonic() < deadline:
+        if state["state"] == "game_over":
+            state = await request("start_new")
+        elif state["state"] == "waiting_guess":
+            hint = (await request("hint"))["hint"]
+            await request("hint_ok")
+            state = await request(max(GUESSES, key=hint.get))
+        else:
+            state = await receive()  # Dealer reveal or end of the result banner
+    writer.close()
+
+
+def raise_file_limit(needed):
+    """Lift the open-file soft limit towards needed where the OS allows it"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        if target < needed:
+            print(f"Open-file limit {hard} is too low for {needed:,} sockets")
+
+
+def run_clients(host, port, clients, duration, ramp):
+    """Worker: run a share of the load test clients, return (latencies, failures)"""
+    raise_file_limit(clients + 64)
+
+    async def run():
+        latencies = []
+        deadline = time.monotonic() + duration
+        results = await asyncio.gather(
+            *(play_client(host, port, index * ramp / clients, deadline, latencies)
+              for index in range(clients)),
+            return_exceptions=True)
+        return latencies, [repr(r) for r in results if isinstance(r, Exception)]
+    return asyncio.run(run())
+
+
+async def run_load(clients, duration, ramp, workers, idle_timeout, seed, decks=1):
+    """Serve on a loopback port while worker processes play against it"""
+    raise_file_limit(clients + 64)
+    server = GameServer(idle_timeout, seed, decks)
+    listener = await server.start("127.0.0.1", 0)
+    host, port = listener.sockets[0].getsockname()[:2]
+
+    loop = asyncio.get_running_loop()
+    shares = [clients // workers + (index < clients % workers) for index in range(workers)]
+    cpu_start = time.process_time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = await asyncio.gather(*(loop.run_in_executor(pool, run_clients, host, port, share, duration, ramp)
+                                         for share in shares if share))
+    server_cpu = time.process_time() - cpu_start
+    listener.close()
+
+    latencies = sorted(latency for share_latencies, _ in results for latency in share_latencies)
+    failures = [failure for _, share_failures in results for failure in share_failures]
+    count = len(latencies)
+    print(f"{clients:,} sessions of {decks} deck{'s' if decks > 1 else ''}, {count:,} actions in {duration:.0f} s ({count / duration:,.0f} actions/s), "
+          f"server CPU {server_cpu / duration:.0%} of one core")
+    if count:
+        print(f"latency p50 {latencies[count // 2] * 1000:.3f} ms, "
+              f"p99 {latencies[min(count - 1, int(count * 0.99))] * 1000:.3f} ms")
+    if failures:
+        print(f"{len(failures)} clients failed, first: {failures[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guess High Low multi-session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds of client silence before a session is evicted")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="54-card decks in every session's shoe")
+    parser.add_argument("--snapshot-key", default=os.environ.get("GHL_SNAPSHOT_KEY"),
+                        help="secret signing snapshots, shared by servers that restore each other's "
+                             "(default: $GHL_SNAPSHOT_KEY, else random per server)")
+    parser.add_argument("--load", type=int, metavar="CLIENTS",
+                        help="run a loopback load test with this many clients instead of serving")
+    parser.add_argument("--duration", type=float, default=30, help="load test length in seconds")
+    parser.add_argument("--ramp", type=float, default=3, help="seconds over which load test clients connect")
+    parser.add_argument("--client-workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="processes running the load test clients")
+    args = parser.parse_args()
+
+    if args.load:
+        asyncio.run(run_load(args.load, args.duration, args.ramp, args.client_workers,
+                             args.idle_timeout, args.seed, args.decks))
+        return
+
+    async def serve():
+        key = args.snapshot_key.encode() if args.snapshot_key else None
+        server = GameServer(args.idle_timeout, args.seed, args.decks, key)
+        listener = await server.start(args.host, args.port)
+        print(f"Serving on {args.host}:{args.port}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Vectorized Monte Carlo simulator for Guess High Low.
+
+Plays many complete games at once with NumPy arrays: every row is one
+shuffled deck, dealt in computer/player pairs and scored with the same
+10/100-point rules as GameEngine.check_guess. Guesses come from the
+GuessHighLow_bots bots, one decide_batch() call per round for all games. Multi-deck shoes play in
+smaller batches so a batch holds about the same number of cards.
+
+Usage:
+    python GuessHighLow_sim.py -n 1000000 --strategy most_likely --seed 1
+    python GuessHighLow_sim.py -n 10000 --decks 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from GuessHighLow_bots import BOTS, HIGHER, LOWER
+from GuessHighLow_engine import (CARD_VALUE, DECK_SIZE, GameRng, CORRECT_SCORE, BONUS_SCORE,
+                                 BONUS_PROBABILITY, MAX_CARD_VALUE, TableView)
+
+MAX_CHUNK_CARDS = 200_000 * DECK_SIZE  # Cards dealt per vectorized batch at most
+
+
+def deck_values(decks=1):
+    """Card values of a fresh shoe of decks as a NumPy array"""
+    return np.tile(np.frombuffer(CARD_VALUE, dtype=np.uint8).astype(np.int8), decks)
+
+
+STRATEGIES = BOTS
+
+
+class SimulationResult:
+    def __init__(self, scores, round_hits, round_bonuses, elapsed):
+        self.scores = scores                # Final score per game
+        self.round_hits = round_hits        # Correct guesses per round index
+        self.round_bonuses = round_bonuses  # Bonus hits per round index
+        self.elapsed = elapsed
+
+    @property
+    def n_games(self):
+        return len(self.scores)
+
+    @property
+    def hit_rates(self):
+        """Fraction of games with a correct guess in each round"""
+        return self.round_hits / max(self.n_games, 1)
+
+    @property
+    def bonus_rates(self):
+        """Fraction of games with a bonus hit in each round"""
+        return self.round_bonuses / max(self.n_games, 1)
+
+    @property
+    def games_per_second(self):
+        return self.n_games / self.elapsed if self.elapsed > 0 else float("inf")
+
+
+def simulate_chunk(values, n_games, bot, game_rng):
+    """Play n_games complete games, return (scores, hits, bonuses)"""
+    n_cards = len(values)
+    n_rounds = n_cards // 2
+    rows = np.arange(n_games)
+
+    # Shuffled decks, one per row
+    decks = game_rng.shuffled(values, n_games)
+
+    # Unrevealed cards per value, the deck plus the player's face-down card.
+    # Values run along the first axis so the prefix sum is contiguous per value.
+    count_type = np.int16 if n_cards <= np.iinfo(np.int16).max else np.int32
+    counts = np.empty((MAX_CARD_VALUE + 1, n_games), dtype=count_type)
+    counts[:] = np.bincount(values, minlength=MAX_CARD_VALUE + 1)[:, None]
+
+    scores = np.zeros(n_games, dtype=np.int32)
+    hits = np.zeros(n_rounds, dtype=np.int64)
+    bonuses = np.zeros(n_rounds, dtype=np.int64)
+
+    for round_index in range(n_rounds):
+        computer = decks[:, 2 * round_index]
+        player = decks[:, 2 * round_index + 1]
+
+        # Computer card is revealed before the guess
+        counts[computer, rows] -= 1
+        total = n_cards - 2 * round_index - 1
+        prefix = counts.cumsum(axis=0, dtype=count_type)
+        lower = prefix[computer - 1, rows]
+        tie = counts[computer, rows]
+        higher = total - prefix[computer, rows]
+
+        guess = bot.decide_batch(TableView(computer, counts, scores, higher, lower, tie))
+        outs = np.where(guess == HIGHER, higher, np.where(guess == LOWER, lower, tie))
+        correct = np.where(guess == HIGHER, player > computer,
+                           np.where(guess == LOWER, player < computer, player == computer))
+        bonus = correct & (outs / total < BONUS_PROBABILITY)
+
+        scores += np.where(bonus, BONUS_SCORE, np.where(correct, CORRECT_SCORE, 0))
+        hits[round_index] = np.count_nonzero(correct)
+        bonuses[round_index] = np.count_nonzero(bonus)
+
+        # Player card is revealed after the guess
+        counts[player, rows] -= 1
+
+    return scores, hits, bonuses
+
+
+def simulate_games(n_games, strategy="most_likely", seed=None, chunk_size=200_000, rng=None, decks=1):
+    """Play n_games complete games and return a SimulationResult
+
+    strategy is a bot name or a GuessHighLow_bots.Bot. Games are drawn
+    from rng (a GameRng), or from a new one seeded with seed.
+    """
+    rng = rng if rng is not None else GameRng(seed)
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy](rng)
+    values = deck_values(decks)
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_CARDS // len(values)))
+    n_rounds = len(values) // 2
+
+    scores = np.empty(n_games, dtype=np.int32)
+    hits = np.zeros(n_rounds, dtype=np.int64)
+    bonuses = np.zeros(n_rounds, dtype=np.int64)
+
+    start = time.perf_counter()
+    for offset in range(0, n_games, chunk_size):
+        size = min(chunk_size, n_games - offset)
+        chunk_scores, chunk_hits, chunk_bonuses = simulate_chunk(values, size, strategy, rng)
+        scores[offset:offset + size] = chunk_scores
+        hits += chunk_hits
+        bonuses += chunk_bonuses
+    elapsed = time.perf_counter() - start
+
+    return SimulationResult(scores, hits, bonuses, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of Guess High Low games")
+    parser.add_argument("-n", "--games", type=int, default=1_000_000, help="number of games")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="most_likely")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="games per vectorized batch")
+    parser.add_argument("--decks", type=int, default=1, help="54-card decks in the shoe")
+    parser.add_argument("--rounds", type=int, default=None, help="rounds listed in the hit rate table (default: all)")
+    args = parser.parse_args()
+
+    result = simulate_games(args.games, args.strategy, args.seed, args.chunk_size, decks=args.decks)
+
+    print(f"Games: {result.n_games}  Strategy: {args.strategy}  Decks: {args.decks}")
+    print(f"Elapsed: {result.elapsed:.2f} s  ({result.games_per_second:,.0f} games/s)")
+    print(f"Score: mean {result.scores.mean():.2f}  std {result.scores.std():.2f}  "
+          f"min {result.scores.min()}  max {result.scores.max()}")
+    for percentile in (5, 50, 95):
+        print(f"  p{percentile}: {np.percentile(result.scores, percentile):.0f}")
+    print("Round  hit rate  bonus rate")
+    rates = list(zip(result.hit_rates, result.bonus_rates))[:args.rounds]
+    for round_index, (hit_rate, bonus_rate) in enumerate(rates, 1):
+        print(f"{round_index:5d}  {hit_rate:8.3f}  {bonus_rate:10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Compact binary snapshots of a game in progress.
+
+A snapshot holds everything needed to continue a game exactly where it
+stopped: deck order and cursor, which dealt cards are face up, score,
+game state, time already spent on a pending reveal or result banner, and
+the open dialogs, and the position of the game's shuffle stream, so later
+shuffles come out as they would have without the snapshot. While at most
+SHUFFLE_REPLAY_CARDS cards have been shuffled, the position is the list of
+shuffle sizes, which restore() replays once from the game seed; after that
+it is the stream's Mersenne Twister state (2.5 kB).
+The stream that seeds future games belongs to the restoring engine and is
+not part of it.
+
+Snapshot layout (little endian):
+    magic "GHLS", version byte, 256-bit game seed (64-bit before version 4),
+    32-bit score,
+    game state code, dialog flags byte,
+    varints: computer card + 1, player card + 1 (0 for no card),
+             ms elapsed since the deal, ms elapsed since the result,
+             deck cursor, bonus count (version 2 on),
+    deck array typecode, varint deck length, raw deck array,
+    bitmap of face-up cards among the dealt ones (in dealing order),
+    varint shuffle count, varint deck size per shuffle, or with the stream
+    state flag (version 3 on) the 625 32-bit words of the stream state,
+    then per open dialog: result points; hint counts higher, lower, tie,
+    remaining; shuffle total and both preview lists.
+The shoe size follows from the deck length. A fresh 54-card game is about
+135 bytes.
+
+restore() validates the whole snapshot, but a well-formed one can still
+carry any score. Servers hand out signed() snapshots and only restore
+those that pass verified() under their key.
+"""
+import hashlib
+import hmac
+import struct
+import sys
+from array import array
+
+from GuessHighLow_engine import (GameEngine, GameRng, DECK_SIZE, MAX_DECKS, SEED_BITS, SHUFFLE_PREVIEW,
+                                 SHUFFLE_REPLAY_CARDS, CARD_IN_DECK, CARD_DEALT, CARD_REVEALED,
+                                 deck_typecode)
+from GuessHighLow_replay import read_varint, write_varint
+
+MAGIC = b"GHLS"
+VERSION = 4
+SUPPORTED_VERSIONS = (1, 2, 3, 4)  # Version 1 has no bonus count, 3 added the stream state, 4 widened the seed
+PREFIX = struct.Struct("<4sB")
+HEADER = struct.Struct(f"<4sB{SEED_BITS // 8}sIBB")
+HEADER_V1 = struct.Struct("<4sBQIBB")  # Versions 1 to 3: 64-bit seeds
+STREAM_STATE = struct.Struct("<625I")  # Mersenne Twister key words and position
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+GAME_STATES = ("idle", "dealing", "waiting_guess", "revealing", "game_over")
+STATE_CODES = {name: code for code, name in enumerate(GAME_STATES)}
+
+# Dialog flags
+HINT_OPEN = 0x01
+RESULT_OPEN = 0x02
+SHUFFLE_OPEN = 0x04
+INSTRUCTION_OPEN = 0x08
+RESULT_CORRECT = 0x10
+RESULT_BONUS = 0x20
+STREAM_STATE_STORED = 0x40  # Shuffle stream state instead of the shuffle history
+KNOWN_FLAGS = (HINT_OPEN | RESULT_OPEN | SHUFFLE_OPEN | INSTRUCTION_OPEN | RESULT_CORRECT | RESULT_BONUS
+               | STREAM_STATE_STORED)
+
+# Whether the computer and the player card of the dealt round are face up, by game state
+DEALT_FACE_UP = {
+    "dealing": (False, False),
+    "waiting_guess": (True, False),
+    "revealing": (True, True),
+    "game_over": (True, True),  # Last round of the game
+}
+
+
+def write_cards(out, cards):
+    write_varint(out, len(cards))
+    for card in cards:
+        write_varint(out, card)
+
+
+def read_cards(data, offset):
+    count, offset = read_varint(data, offset)
+    cards = []
+    for _ in range(count):
+        card, offset = read_varint(data, offset)
+        cards.append(card)
+    return cards, offset
+
+
+def snapshot(engine):
+    """Serialize the engine's game state to bytes"""
+    flags = 0
+    if engine.show_hint_dialog:
+        flags |= HINT_OPEN
+    if engine.show_result:
+        flags |= RESULT_OPEN
+        if engine.result_info.get("is_correct"):
+            flags |= RESULT_CORRECT
+        if engine.result_info.get("bonus"):
+            flags |= RESULT_BONUS
+    if engine.show_shuffle_dialog:
+        flags |= SHUFFLE_OPEN
+    if engine.show_instruction_dialog:
+        flags |= INSTRUCTION_OPEN
+    if engine.shuffle_history is None:
+        flags |= STREAM_STATE_STORED
+
+    seed = engine.game_seed.to_bytes(SEED_BITS // 8, "little")
+    out = bytearray(HEADER.pack(MAGIC, VERSION, seed, engine.player_score, STATE_CODES[engine.game_state], flags))
+    for card in (engine.computer_card, engine.player_card):
+        write_varint(out, 0 if card is None else card + 1)
+    now = engine.now()
+    write_varint(out, max(0, now - engine.deal_start_time))
+    write_varint(out, max(0, now - engine.result_start_time))
+    write_varint(out, engine.deck_cursor)
+    write_varint(out, engine.bonus_count)
+
+    deck = engine.card_deck
+    out += deck.typecode.encode()
+    write_varint(out, len(deck))
+    if sys.byteorder == "big" and deck.itemsize > 1:
+        swapped = array(deck.typecode, deck)
+        swapped.byteswap()
+        out += swapped.tobytes()
+    else:
+        out += deck.tobytes()
+    revealed = bytearray((engine.deck_cursor + 7) // 8)
+    for index in range(engine.deck_cursor):
+        if engine.card_state[deck[index]] == CARD_REVEALED:
+            revealed[index >> 3] |= 1 << (index & 7)
+    out += revealed
+    if flags & STREAM_STATE_STORED:
+        out += STREAM_STATE.pack(*engine.shuffle_rng.getstate()[1])
+    else:
+        write_cards(out, engine.shuffle_history)
+
+    if flags & RESULT_OPEN:
+        write_varint(out, engine.result_info.get("score_added", 0))
+    if flags & HINT_OPEN:
+        hint = engine.hint_probabilities
+        remaining = hint.get("remaining", 0)
+        for guess in ("higher", "lower", "tie"):
+            write_varint(out, round(hint.get(guess, 0) * remaining))
+        write_varint(out, remaining)
+    if flags & SHUFFLE_OPEN:
+        write_varint(out, engine.shuffle_info.get("total_cards", 0))
+        write_cards(out, engine.shuffle_info.get("previous_order", []))
+        write_cards(out, engine.shuffle_info.get("current_order", []))
+    return bytes(out)
+
+
+def shuffle_stream(game_seed, history):
+    """Shuffle stream of a game positioned after shuffles of the sizes in history
+
+    random.shuffle consumes the stream according to the list length only,
+    so shuffling placeholder lists of the recorded sizes catches it up.
+    """
+    rng = GameRng(game_seed)
+    for size in history:
+        rng.shuffle([0] * size)
+    return rng
+
+
+def signed(data, key):
+    """Snapshot followed by its HMAC-SHA256 tag under key"""
+    return data + hmac.new(key, data, hashlib.sha256).digest()
+
+
+def verified(data, key):
+    """Snapshot of a signed() blob; raises ValueError if the tag does not match key"""
+    payload, tag = data[:-SIGNATURE_SIZE], data[-SIGNATURE_SIZE:]
+    if len(data) <= SIGNATURE_SIZE or not hmac.compare_digest(
+            tag, hmac.new(key, payload, hashlib.sha256).digest()):
+        raise ValueError("Snapshot signature does not match")
+    return payload
+
+
+def read_snapshot(data):
+    """Decode and check a snapshot, return (engine attributes, deal elapsed ms, result elapsed ms)
+
+    Raises ValueError for a truncated snapshot or one that describes an
+    impossible game.
+    """
+    try:
+        return _read_snapshot(data)
+    except (IndexError, struct.error) as exc:
+        raise ValueError("Truncated snapshot") from exc
+
+
+def _read_snapshot(data):
+    magic, version = PREFIX.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a Guess High Low snapshot")
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    header = HEADER if version >= 4 else HEADER_V1
+    _, _, game_seed, score, state_code, flags = header.unpack_from(data, 0)
+    if version >= 4:
+        game_seed = int.from_bytes(game_seed, "little")
+    if state_code >= len(GAME_STATES) or flags & ~KNOWN_FLAGS:
+        raise ValueError("Invalid game state or dialog flags")
+    game_state = GAME_STATES[state_code]
+    offset = header.size
+
+    cards = []
+    for _ in range(2):
+        card, offset = read_varint(data, offset)
+        cards.append(None if card == 0 else card - 1)
+    deal_elapsed, offset = read_varint(data, offset)
+    result_elapsed, offset = read_varint(data, offset)
+    cursor, offset = read_varint(data, offset)
+    bonus_count = 0
+    if version >= 2:
+        bonus_count, offset = read_varint(data, offset)
+
+    typecode = chr(data[offset])
+    length, offset = read_varint(data, offset + 1)
+    if not length or length % DECK_SIZE or length // DECK_SIZE > MAX_DECKS:
+        raise ValueError(f"Deck of {length} cards is not a shoe of 1 to {MAX_DECKS} decks")
+    if typecode != deck_typecode(length):
+        raise ValueError(f"Deck typecode {typecode!r} does not fit a {length}-card shoe")
+    deck = array(typecode)
+    end = offset + length * deck.itemsize
+    if end > len(data):
+        raise ValueError("Truncated snapshot")
+    deck.frombytes(data[offset:end])
+    if sys.byteorder == "big" and deck.itemsize > 1:
+        deck.byteswap()
+    offset = end
+    if max(deck) >= length or len(set(deck)) != length:
+        raise ValueError("Deck is not a permutation of the shoe")
+    if cursor > length or cursor % 2:
+        raise ValueError(f"Deck cursor {cursor} out of range")
+    if cards == [None, None]:
+        if game_state not in ("idle", "game_over"):
+            raise ValueError(f"No cards dealt in state {game_state}")
+    elif cursor < 2 or cards != deck[cursor - 2:cursor].tolist():
+        raise ValueError("Dealt cards do not match the deck")
+    if (game_state == "revealing") != bool(flags & RESULT_OPEN):
+        raise ValueError("Result banner does not match the game state")
+
+    revealed_size = (cursor + 7) // 8
+    revealed = data[offset:offset + revealed_size]
+    if len(revealed) < revealed_size:
+        raise ValueError("Truncated snapshot")
+    offset += revealed_size
+    card_state = bytearray([CARD_IN_DECK]) * length
+    for index in range(cursor):
+        face_up = revealed[index >> 3] & (1 << (index & 7))
+        card_state[deck[index]] = CARD_REVEALED if face_up else CARD_DEALT
+    # A state whose cards are turned differently could never move on
+    finished = cursor
+    if cards != [None, None]:
+        finished -= 2
+        if tuple(card_state[card] == CARD_REVEALED for card in cards) != DEALT_FACE_UP.get(game_state):
+            raise ValueError(f"Face-up cards do not match the {game_state} state")
+    if any(card_state[card] != CARD_REVEALED for card in deck[:finished]):
+        raise ValueError("Cards of finished rounds must be face up")
+    if flags & STREAM_STATE_STORED:
+        state = (3, STREAM_STATE.unpack_from(data, offset), None)
+        offset += STREAM_STATE.size
+        shuffle_rng = GameRng(game_seed)
+        shuffle_rng.setstate(state)  # ValueError for an impossible position
+        history = None
+    else:
+        history, offset = read_cards(data, offset)
+        if any(not 0 < size <= length for size in history):
+            raise ValueError("Invalid shuffle history")
+        if sum(history) > SHUFFLE_REPLAY_CARDS:
+            raise ValueError(f"Shuffle history of more than {SHUFFLE_REPLAY_CARDS} cards")
+        shuffle_rng = shuffle_stream(game_seed, history)
+
+    result_info = {}
+    if flags & RESULT_OPEN:
+        score_added, offset = read_varint(data, offset)
+        result_info = {
+            "is_correct": bool(flags & RESULT_CORRECT),
+            "score_added": score_added,
+            "bonus": bool(flags & RESULT_BONUS)
+        }
+    hint_probabilities = {}
+    if flags & HINT_OPEN:
+        counts = []
+        for _ in range(4):
+            count, offset = read_varint(data, offset)
+            counts.append(count)
+        higher, lower, tie, remaining = counts
+        hint_probabilities = {
+            "higher": higher / remaining if remaining > 0 else 0,
+            "lower": lower / remaining if remaining > 0 else 0,
+            "tie": tie / remaining if remaining > 0 else 0,
+            "remaining": remaining
+        }
+    previous_order = []
+    shuffle_info = {}
+    if flags & SHUFFLE_OPEN:
+        total, offset = read_varint(data, offset)
+        previous_order, offset = read_cards(data, offset)
+        current, offset = read_cards(data, offset)
+        if len(previous_order) > SHUFFLE_PREVIEW or len(current) > SHUFFLE_PREVIEW:
+            raise ValueError("Shuffle preview too long")
+        shuffle_info = {
+            "previous_order": previous_order,
+            "current_order": current,
+            "total_cards": total
+        }
+    if offset != len(data):
+        raise ValueError("Trailing bytes after snapshot")
+
+    attributes = {
+        "game_seed": game_seed,
+        "shuffle_rng": shuffle_rng,
+        "shuffle_history": history,
+        "card_deck": deck,
+        "deck_cursor": cursor,
+        "card_state": card_state,
+        "player_score": score,
+        "bonus_count": bonus_count,
+        "computer_card": cards[0],
+        "player_card": cards[1],
+        "game_state": game_state,
+        "show_result": bool(flags & RESULT_OPEN),
+        "result_info": result_info,
+        "show_hint_dialog": bool(flags & HINT_OPEN),
+        "hint_probabilities": hint_probabilities,
+        "show_shuffle_dialog": bool(flags & SHUFFLE_OPEN),
+        "shuffle_info": shuffle_info,
+        "previous_deck_order": previous_order,
+        "show_instruction_dialog": bool(flags & INSTRUCTION_OPEN),
+    }
+    return attributes, deal_elapsed, result_elapsed
+
+
+def restore(data, engine=None):
+    """Load a snapshot into engine (a new GameEngine by default) and return it
+
+    The whole snapshot is checked before the engine is touched, so one that
+    raises ValueError leaves the engine as it was.
+    """
+    attributes, deal_elapsed, result_elapsed = read_snapshot(data)
+    engine = engine or GameEngine()
+    decks = len(attributes["card_deck"]) // DECK_SIZE
+    if decks != engine.decks:
+        engine.set_decks(decks)
+    for name, value in attributes.items():
+        setattr(engine, name, value)
+    engine.recount_values()
+    now = engine.now()
+    engine.deal_start_time = now - deal_elapsed
+    engine.result_start_time = now - result_elapsed
+    return engine
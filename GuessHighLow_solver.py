@@ -0,0 +1,155 @@
+"""Exact expected-score solver for Guess High Low.
+
+The guess only decides the points of the current round: which cards are
+dealt next does not depend on it. So the best guess is the one with the
+highest expected points now, and the expected score of the rest of the
+game is a sum over the remaining rounds.
+
+For a round dealt from a random m-card subset of the unrevealed cards,
+the points only depend on how many cards lie below, at and above the
+computer card's value. The expectation over all subsets therefore
+collapses onto a (lower, tie, higher, m) composition key, which is
+memoized, instead of enumerating every multiset of remaining values. The
+sum over the remaining rounds is memoized per deck composition as well.
+
+The expected score still grows steeply with the number of cards, so it is
+only computed up to SOLVER_MAX_CARDS unrevealed cards (one deck), which
+keeps the hint dialog's solve on the frame loop short; larger shoes get
+expected scores once they are down to that size. The best guess itself
+needs no look-ahead and is available for any shoe.
+"""
+from functools import lru_cache
+
+from GuessHighLow_engine import (DECK_SIZE, GUESSES, CORRECT_SCORE, BONUS_SCORE,
+                                 BONUS_PROBABILITY, MAX_CARD_VALUE)
+
+SOLVER_MAX_CARDS = DECK_SIZE  # Expected scores take about 20 ms here, and grow ~n^2.5 (two decks: 0.15 s)
+
+
+def guess_points(outs, total):
+    """Expected points of a guess with outs winning cards among total"""
+    if total <= 0 or outs <= 0:
+        return 0.0
+    probability = outs / total
+    points = BONUS_SCORE if probability < BONUS_PROBABILITY else CORRECT_SCORE
+    return probability * points
+
+
+def best_points(lower, tie, higher):
+    """Expected points of the best guess given the unrevealed counts"""
+    total = lower + tie + higher
+    return max(guess_points(higher, total), guess_points(lower, total), guess_points(tie, total))
+
+
+@lru_cache(maxsize=None)
+def binomial(n, k):
+    """Binomial coefficient as a float"""
+    if k < 0 or k > n:
+        return 0.0
+    if k == 0 or k == n:
+        return 1.0
+    return binomial(n - 1, k - 1) + binomial(n - 1, k)
+
+
+@lru_cache(maxsize=1 << 20)
+def pivot_round_points(below, equal, above, size):
+    """Expected best points from a round dealt out of a random size-card subset,
+    counting only rounds whose computer card has the pivot value
+
+    below/equal/above are the unrevealed cards under, at and over the pivot.
+    """
+    total = below + equal + above
+    subsets = binomial(total, size)
+    points = 0.0
+    for tie in range(1, min(equal, size) + 1):
+        # Computer card is one of the `tie` pivot cards in the subset
+        weight_equal = binomial(equal, tie) * tie / size
+        for lower in range(max(0, size - tie - above), min(below, size - tie) + 1):
+            higher = size - tie - lower
+            weight = weight_equal * binomial(below, lower) * binomial(above, higher)
+            points += weight * best_points(lower, tie - 1, higher)
+    return points / subsets
+
+
+def round_points(counts, size):
+    """Expected best points of a round dealt from a random size-card subset of counts"""
+    points = 0.0
+    below = 0
+    total = sum(counts)
+    for value in range(MAX_CARD_VALUE + 1):
+        equal = counts[value]
+        if equal:
+            points += pivot_round_points(below, equal, total - below - equal, size)
+        below += equal
+    return points
+
+
+def remaining_game_points(counts, size=None):
+    """Expected score of all rounds still to be dealt from a random size-card
+    subset of cards with these value counts (all of them by default)"""
+    counts = tuple(counts)
+    return _remaining_game_points(counts, sum(counts) if size is None else size)
+
+
+@lru_cache(maxsize=4096)
+def _remaining_game_points(counts, size):
+    points = 0.0
+    while size >= 2:
+        points += round_points(counts, size)
+        size -= 2
+    return points
+
+
+def unrevealed_counts(engine):
+    """Value counts of the remaining deck plus the player's face-down card"""
+    counts = list(engine.value_counts)
+    if engine.player_card is not None:
+        counts[engine.card_values[engine.player_card]] += 1
+    return counts
+
+
+def solvable(engine):
+    """True if guess_values() is quick enough for this many unrevealed cards"""
+    return engine.cards_left() + (engine.player_card is not None) <= SOLVER_MAX_CARDS
+
+
+def guess_values(engine):
+    """Expected score from now to game over for each guess, as a dict
+
+    Valid while the engine waits for a guess: the computer card is up and
+    the player's card is still face down. Raises ValueError for shoes
+    larger than SOLVER_MAX_CARDS.
+    """
+    if not solvable(engine):
+        raise ValueError(f"Expected scores are limited to {SOLVER_MAX_CARDS} unrevealed cards")
+    counts = unrevealed_counts(engine)
+    pivot = engine.card_values[engine.computer_card]
+    lower = sum(counts[:pivot])
+    tie = counts[pivot]
+    higher = sum(counts[pivot + 1:])
+    total = lower + tie + higher
+
+    # The player's card is a random unrevealed card, so the next deck is a
+    # random (total - 1)-card subset of the unrevealed cards
+    future = remaining_game_points(counts, total - 1)
+
+    outs = {"higher": higher, "lower": lower, "tie": tie}
+    return {guess: guess_points(outs[guess], total) + future for guess in GUESSES}
+
+
+def optimal_guess(engine):
+    """Optimal guess without the expected score: only this round's points matter"""
+    counts = unrevealed_counts(engine)
+    pivot = engine.card_values[engine.computer_card]
+    lower = sum(counts[:pivot])
+    tie = counts[pivot]
+    total = sum(counts)
+    outs = {"higher": total - lower - tie, "lower": lower, "tie": tie}
+    return max(GUESSES, key=lambda guess: guess_points(outs[guess], total))
+
+
+def best_guess(engine):
+    """Optimal guess and its expected score from now to game over"""
+    values = guess_values(engine)
+    guess = max(GUESSES, key=values.get)
+    return guess, values[guess]
@@ -0,0 +1,124 @@
+"""Tournament of guessing strategies for Guess High Low.
+
+Every strategy (a GuessHighLow_bots bot) plays the same shuffled decks
+through GameEngine, so scores follow exactly the rules of the game window.
+Games are spread over a process pool in batches; each batch gets its own independent GameRng
+stream spawned from the tournament seed, and results are merged as
+batches finish.
+
+Usage:
+    python GuessHighLow_tournament.py -n 1000000 --workers 64 --seed 1
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from GuessHighLow_bots import BOTS
+from GuessHighLow_engine import SEED_BITS, GameEngine, GameRng
+
+
+STRATEGIES = BOTS  # Same names as the sim and the game's --bot; best_points is the solver's optimal guess
+
+
+def play_game(engine, bot, seed=None):
+    """Play one complete game headless and return the final score"""
+    engine.start_new_game(seed)
+    while engine.game_state != "game_over":
+        engine.reveal_computer_card()
+        engine.make_guess(bot.decide(engine.table_view()))
+        engine.finish_round()
+    return engine.player_score
+
+
+def play_batch(strategy_names, n_games, rng, decks=1):
+    """Worker: play n_games decks with every strategy, return per-strategy totals"""
+    totals = {name: [0, 0, None, None] for name in strategy_names}  # sum, sum of squares, min, max
+    engine = GameEngine(decks=decks)
+    deck_rng, guess_rng = rng.spawn(2)
+    bots = {name: STRATEGIES[name](guess_rng) for name in strategy_names}
+    for _ in range(n_games):
+        # Same deck for every strategy
+        deck_seed = deck_rng.getrandbits(SEED_BITS)
+        for name in strategy_names:
+            score = play_game(engine, bots[name], deck_seed)
+            total = totals[name]
+            total[0] += score
+            total[1] += score * score
+            total[2] = score if total[2] is None else min(total[2], score)
+            total[3] = score if total[3] is None else max(total[3], score)
+    return n_games, totals
+
+
+class Standings:
+    """Running per-strategy score statistics merged from worker batches"""
+
+    def __init__(self, strategy_names):
+        self.games = 0
+        self.totals = {name: [0, 0, None, None] for name in strategy_names}
+
+    def add(self, n_games, totals):
+        self.games += n_games
+        for name, (score_sum, square_sum, low, high) in totals.items():
+            total = self.totals[name]
+            total[0] += score_sum
+            total[1] += square_sum
+            total[2] = low if total[2] is None else min(total[2], low)
+            total[3] = high if total[3] is None else max(total[3], high)
+
+    def rows(self):
+        """(name, mean, std, min, max) sorted by mean score"""
+        rows = []
+        for name, (score_sum, square_sum, low, high) in self.totals.items():
+            mean = score_sum / self.games
+            variance = max(square_sum / self.games - mean * mean, 0.0)
+            rows.append((name, mean, variance ** 0.5, low, high))
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def run_tournament(strategy_names, n_games, workers=None, batch_size=10_000, seed=None, progress=None,
+                   decks=1):
+    """Play n_games shuffled decks per strategy across a process pool"""
+    workers = workers or os.cpu_count()
+    batches = [min(batch_size, n_games - start) for start in range(0, n_games, batch_size)]
+    batch_rngs = GameRng(seed).spawn(len(batches))  # Independent stream per batch
+    standings = Standings(strategy_names)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_batch, strategy_names, size, batch_rng, decks)
+                   for size, batch_rng in zip(batches, batch_rngs)]
+        for future in as_completed(futures):
+            standings.add(*future.result())
+            if progress:
+                progress(standings)
+    return standings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guess High Low strategy tournament")
+    parser.add_argument("-n", "--games", type=int, default=100_000, help="decks per strategy")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="games per worker task")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="54-card decks in the shoe")
+    args = parser.parse_args()
+
+    def progress(standings):
+        print(f"\r{standings.games:,}/{args.games:,} games", end="", flush=True)
+
+    start = time.perf_counter()
+    standings = run_tournament(args.strategies, args.games, args.workers, args.batch_size,
+                               args.seed, progress, args.decks)
+    elapsed = time.perf_counter() - start
+    print()
+
+    total_games = standings.games * len(args.strategies)
+    print(f"{total_games:,} games in {elapsed:.1f} s ({total_games / elapsed:,.0f} games/s)")
+    print(f"{'Strategy':<15}{'Mean':>9}{'Std':>9}{'Min':>6}{'Max':>6}")
+    for name, mean, std, low, high in standings.rows():
+        print(f"{name:<15}{mean:9.2f}{std:9.2f}{low:6d}{high:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Shuffle audit statistics under a fair shuffle"""
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from GuessHighLow_audit import calibrate
+
+
+def test_statistics_have_chi_square_means():
+    runs, n_decks = 150, 200
+    for name, mean, df, fail_rate in calibrate(runs, n_decks, source="game", seed=1):
+        # A chi-square statistic has variance 2 df
+        assert abs(mean - df) < 4 * math.sqrt(2 * df / runs), name
@@ -0,0 +1,42 @@
+"""Bot API"""
+import pytest
+
+from GuessHighLow_bots import BOTS, Bot
+from GuessHighLow_engine import GameEngine, ManualClock
+from GuessHighLow_solver import best_guess, guess_values, optimal_guess
+
+
+def test_bot_without_decide_fails_when_created():
+    class Forgetful(Bot):
+        name = "forgetful"
+
+    with pytest.raises(TypeError):
+        Forgetful()
+
+    class Stubborn(Bot):
+        name = "stubborn"
+
+        def decide(self, view):
+            return "tie"
+
+    assert Stubborn().decide(None) == "tie"
+
+
+def test_registry_names_match_bots():
+    assert all(bot.name == name for name, bot in BOTS.items())
+    assert set(BOTS) == {"most_likely", "best_points", "bonus_hunting", "random"}
+
+
+def test_best_points_bot_plays_optimal_guess():
+    bot = BOTS["best_points"]()
+    for seed in range(20):
+        engine = GameEngine(seed=seed, clock=ManualClock())
+        engine.start_new_game()
+        while engine.game_state != "game_over":
+            engine.reveal_computer_card()
+            guess, value = best_guess(engine)
+            values = guess_values(engine)
+            assert values[optimal_guess(engine)] == value
+            assert values[bot.decide(engine.table_view())] == value
+            engine.make_guess(guess)
+            engine.finish_round()
@@ -0,0 +1,168 @@
+"""GameEngine: rules against the original game, random streams, clocks and input dispatch"""
+import random
+
+import pytest
+
+from GuessHighLow_bots import BOTS
+from GuessHighLow_engine import (CARD_VALUE, GUESSES, GameEngine, GameRng, InstantClock, ManualClock,
+                                 ScaledClock)
+from GuessHighLow_replay import ReplayRecorder
+
+
+class BaselineRules:
+    """Deck, probability and scoring rules of the baseline PokerGame, on card values"""
+
+    def __init__(self, deck_values):
+        self.card_deck = list(deck_values)
+        self.computer = self.player = None
+        self.score = 0
+
+    def deal(self):
+        self.computer, self.player = self.card_deck.pop(0), self.card_deck.pop(0)
+
+    def calculate_probabilities(self):
+        total_cards = len(self.card_deck) + 1
+        unrevealed = self.card_deck + [self.player]
+        higher = sum(value > self.computer for value in unrevealed)
+        lower = sum(value < self.computer for value in unrevealed)
+        tie = sum(value == self.computer for value in unrevealed)
+        return {"higher": higher / total_cards, "lower": lower / total_cards,
+                "tie": tie / total_cards, "remaining": total_cards}
+
+    def check_guess(self, guess):
+        is_correct = ((guess == "higher" and self.player > self.computer) or
+                      (guess == "lower" and self.player < self.computer) or
+                      (guess == "tie" and self.player == self.computer))
+        score_added = 0
+        bonus = False
+        if is_correct:
+            if self.calculate_probabilities()[guess] < 0.1:
+                score_added, bonus = 100, True
+            else:
+                score_added = 10
+            self.score += score_added
+        return is_correct, score_added, bonus
+
+
+def deck_values(engine):
+    return [CARD_VALUE[card] for card in engine.remaining_cards()]
+
+
+def test_rules_match_baseline():
+    rnd = random.Random(1)
+    for seed in range(200):
+        engine = GameEngine(seed=seed, clock=ManualClock())
+        engine.start_new_game()
+        reference = BaselineRules([CARD_VALUE[card] for card in engine.card_deck])
+        while engine.game_state != "game_over":
+            reference.deal()
+            engine.reveal_computer_card()
+            if rnd.random() < 0.2:
+                engine.shuffle_deck()
+                reference.card_deck = deck_values(engine)
+            assert engine.calculate_probabilities() == reference.calculate_probabilities()
+            guess = rnd.choice(GUESSES)
+            result = engine.make_guess(guess)
+            assert (result["is_correct"], result["score_added"], result["bonus"]) == reference.check_guess(guess)
+            engine.finish_round()
+        assert engine.player_score == reference.score
+        assert len(reference.card_deck) < 2
+
+
+def draws(rng, count=1000):
+    return [rng.getrandbits(32) for _ in range(count)]
+
+
+def test_rng_same_seed_same_streams():
+    assert draws(GameRng(42)) == draws(random.Random(42))  # Root streams are plain random.Random
+    first, second = GameRng(42), GameRng(42)
+    assert [draws(child) for child in first.spawn(3)] == [draws(child) for child in second.spawn(3)]
+    assert draws(first.spawn(1)[0].spawn(1)[0]) == draws(GameRng(42, (3, 0)))
+
+    first_games, second_games = GameEngine(seed=7), GameEngine(seed=7)
+    for _ in range(5):
+        first_games.start_new_game()
+        second_games.start_new_game()
+        assert first_games.remaining_cards() == second_games.remaining_cards()
+
+
+def test_rng_spawned_streams_are_independent():
+    parent = GameRng(42)
+    children = parent.spawn(3) + parent.spawn(2)
+    assert [child.spawn_key for child in children] == [(0,), (1,), (2,), (3,), (4,)]
+    assert draws(parent) == draws(GameRng(42))  # Spawning leaves the parent's stream alone
+
+    streams = [draws(GameRng(42))] + [draws(child) for child in children] + [draws(GameRng(43).spawn(1)[0])]
+    for index, stream in enumerate(streams):
+        for other in streams[index + 1:]:
+            # Each bit agrees with probability 1/2: 32000 bits, standard deviation ~89
+            agreeing = sum(32 - bin(a ^ b).count("1") for a, b in zip(stream, other))
+            assert abs(agreeing - 16000) < 450
+
+
+def test_manual_clock_steps_timed_transitions():
+    engine = GameEngine(seed=5, clock=ManualClock())
+    engine.start_new_game()
+    engine.step(1000)
+    assert engine.game_state == "dealing"  # Reveal is due after, not at, 1000 ms
+    engine.step(1)
+    assert engine.game_state == "waiting_guess"
+    engine.make_guess("tie")
+    engine.step(2000)
+    assert engine.game_state == "revealing"
+    engine.step(1)
+    assert engine.game_state == "dealing"
+    assert engine.cards_left() == 50
+
+
+def test_instant_clock_plays_bot_games():
+    engine = GameEngine(seed=5, clock=InstantClock())
+    engine.bot = BOTS["most_likely"]()
+    engine.handle_button_click("start_new")
+    engine.update()
+    assert engine.game_state == "game_over"
+    assert engine.cards_left() == 0
+    assert engine.now() >= 27 * 3000  # Every reveal and result delay, in game time
+
+
+def test_scaled_clock_shortens_real_waits():
+    clock = ScaledClock(10)
+    assert clock.real_ms(1000) == 100
+    with pytest.raises(ValueError):
+        ScaledClock(0)
+
+
+def test_open_dialog_captures_clicks():
+    engine = GameEngine(seed=3, clock=ManualClock())
+    engine.handle_button_click("start_new")
+    engine.reveal_computer_card()
+    engine.handle_button_click("hint")
+    assert engine.active_buttons() == {"exit", "hint_ok"}
+    engine.handle_button_click("higher")
+    assert engine.game_state == "waiting_guess"
+    assert engine.handle_button_click("exit") == "exit"
+    engine.handle_button_click("hint_ok")
+    engine.handle_button_click("higher")
+    assert engine.game_state == "revealing"
+
+
+def test_bot_waits_for_open_dialog():
+    engine = GameEngine(seed=4, clock=ManualClock())
+    engine.bot = BOTS["best_points"]()
+    engine.recorder = ReplayRecorder()
+    engine.handle_button_click("start_new")
+    engine.clock.advance(1001)
+    engine.update()
+    engine.handle_button_click("instruction")
+    assert engine.pending_timer() is None
+    engine.play_bot()
+    engine.handle_button_click("shuffle")  # Covered by the dialog: not applied, not recorded
+    assert engine.game_state == "waiting_guess"
+    assert [step for _, step in engine.recorder.current.steps] == ["reveal", "instruction"]
+
+    engine.handle_button_click("instruction_ok")
+    name, due = engine.pending_timer()
+    assert name == "bot"
+    engine.clock.time = due + 1
+    engine.update()
+    assert engine.game_state == "revealing"
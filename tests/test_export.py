@@ -0,0 +1,55 @@
+"""Offscreen frame export"""
+import hashlib
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from GuessHighLow_engine import GameEngine, ManualClock
+from GuessHighLow_export import export_game, game_frames
+from GuessHighLow_replay import ReplayLog, ReplayRecorder
+
+import GuessHighLow_20251004r_rc as rc
+
+WIDTH, HEIGHT = rc.SCREEN_WIDTH, rc.SCREEN_HEIGHT
+
+
+def recorded_log():
+    """A few rounds recorded at the game's own pace"""
+    engine = GameEngine(seed=11, clock=ManualClock())
+    engine.recorder = ReplayRecorder()
+    engine.handle_button_click("start_new")
+    for guess in ("higher", "lower", "tie"):
+        engine.step(1001)
+        engine.handle_button_click(guess)
+        engine.step(2001)
+    engine.recorder.finish(engine)
+    log, = engine.recorder.logs
+    return log
+
+
+def test_frames_follow_the_recorded_pace():
+    log = recorded_log()
+    fps = 4
+    digests = [hashlib.sha1(pygame.image.tobytes(surface, "RGB")).hexdigest()
+               for surface in game_frames(rc, log, fps, tail_ms=500)]
+    assert len(digests) == (log.steps[-1][0] + 500) * fps // 1000 + 1
+    assert len(set(digests)) > 3  # Deal, reveal, result and next round look different
+    again = [hashlib.sha1(pygame.image.tobytes(surface, "RGB")).hexdigest()
+             for surface in game_frames(rc, log, fps, tail_ms=500)]
+    assert again == digests  # Confetti and all, exports are reproducible
+
+
+def test_export_writes_png_and_rgb(tmp_path):
+    log = ReplayLog(3, [(1001, "reveal"), (1500, "higher"), (3600, "result")])
+    frames = export_game("rc", log, "game", 2, "png", str(tmp_path), tail_ms=0)
+    assert frames == 3600 * 2 // 1000 + 1
+    names = sorted(path.name for path in tmp_path.glob("*.png"))
+    assert names == [f"game_{index:05d}.png" for index in range(frames)]
+    assert pygame.image.load(str(tmp_path / names[-1])).get_size() == (WIDTH, HEIGHT)
+
+    assert export_game("rc", log, "game", 2, "rgb", str(tmp_path), tail_ms=0) == frames
+    data = (tmp_path / "game.rgb").read_bytes()
+    assert len(data) == frames * WIDTH * HEIGHT * 3
+    last = pygame.image.tobytes(pygame.image.load(str(tmp_path / names[-1])), "RGB")
+    assert data[-WIDTH * HEIGHT * 3:] == last
@@ -0,0 +1,95 @@
+"""SQLite leaderboard: ranks, batched writes and failed writes"""
+import random
+import sqlite3
+import threading
+
+import pytest
+
+from GuessHighLow_leaderboard import Leaderboard
+
+
+class BatchLeaderboard(Leaderboard):
+    """Leaderboard that records the batches its thread processes"""
+
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        super().__init__(*args, **kwargs)
+
+    def process(self, connection, batch):
+        self.batches.append([kind for kind, _, _ in batch])
+        super().process(connection, batch)
+
+    def hold(self):
+        """Keep the thread busy until the returned event is set, so requests queue up"""
+        release, held = threading.Event(), threading.Event()
+
+        def wait(connection):
+            held.set()
+            release.wait(5)
+        self.query(wait)
+        held.wait(5)
+        return release
+
+
+def all_scores(connection):
+    return [score for score, in connection.execute("SELECT score FROM scores")]
+
+
+def test_rank_comes_from_score_counts(tmp_path):
+    rnd = random.Random(1)
+    leaderboard = Leaderboard(str(tmp_path / "board.db"), flush_interval=0.01)
+    rows = [(f"p{rnd.randrange(20)}", rnd.randrange(0, 400, 10), 0, 1_700_000_000 + index)
+            for index in range(2000)]
+    assert leaderboard.record_many(rows).result(5) == len(rows)
+    scores = leaderboard.query(all_scores).result(5)
+    counts = dict(leaderboard.query(lambda c: c.execute("SELECT score, games FROM score_counts").fetchall()).result(5))
+    assert counts == {score: scores.count(score) for score in set(scores)}
+
+    for score in (-10, 0, 5, 200, 390, 1000):
+        expected = (sum(s > score for s in scores) + 1, len(scores))
+        assert leaderboard.rank(score).result(5) == expected
+    best = max(scores)
+    assert leaderboard.top(3).result(5)[0][1] == best
+    name = rows[0][0]
+    player_best = max(row[1] for row in rows if row[0] == name)
+    assert leaderboard.player(name).result(5) == (player_best,) + leaderboard.rank(player_best).result(5)
+    assert leaderboard.player("nobody").result(5) is None
+
+    # The game-over submit answers with the new game's rank, ties sharing the best one
+    assert leaderboard.submit("me", best, 1).result(5) == (1, len(scores) + 1)
+    leaderboard.close()
+
+
+def test_queued_writes_share_a_transaction(tmp_path):
+    leaderboard = BatchLeaderboard(str(tmp_path / "board.db"), flush_interval=0.01)
+    release = leaderboard.hold()
+    games = [leaderboard.submit(f"p{index}", index * 10, 0) for index in range(50)]
+    bulk = leaderboard.record_many([("bulk", 5, 0, None)] * 20)
+    release.set()
+
+    assert bulk.result(5) == 20
+    ranks = [future.result(5) for future in games]
+    assert leaderboard.batches[1:] == [["write"] * 51]
+    # Ranks are read after the batch commits, so they all count its 70 games
+    assert ranks == [(50 - index, 70) if index else (70, 70) for index in range(50)]
+    leaderboard.close()
+    assert len(sqlite3.connect(str(tmp_path / "board.db")).execute("SELECT * FROM scores").fetchall()) == 70
+
+
+def test_failed_writes_reach_their_futures(tmp_path):
+    leaderboard = BatchLeaderboard(str(tmp_path / "board.db"), flush_interval=0.01)
+    leaderboard.submit("before", 100, 0).result(5)
+
+    release = leaderboard.hold()
+    good = leaderboard.submit("good", 50, 0)
+    bad = leaderboard.submit(None, 60, 0)  # player is NOT NULL
+    rank = leaderboard.rank(100)
+    release.set()
+
+    for future in (good, bad):
+        with pytest.raises(sqlite3.IntegrityError):
+            future.result(5)
+    assert rank.result(5) == (1, 1)  # The batch rolled back as a whole; queries still answer
+    assert leaderboard.query(all_scores).result(5) == [100]
+    assert leaderboard.submit("after", 10, 0).result(5) == (2, 2)
+    leaderboard.close()
@@ -0,0 +1,79 @@
+"""Text cache and frame profiler"""
+import pytest
+
+pytest.importorskip("pygame")
+
+from GuessHighLow_render import TextCache
+
+
+class CountingFont:
+    """Font stand-in that counts render() calls"""
+
+    def __init__(self):
+        self.renders = []
+
+    def render(self, text, antialias, color):
+        self.renders.append(text)
+        return object()
+
+
+def test_text_cache_evicts_least_recently_used():
+    font = CountingFont()
+    cache = TextCache(max_size=2)
+    first = cache.render(font, "a", True, (0, 0, 0))
+    cache.render(font, "b", True, (0, 0, 0))
+    assert cache.render(font, "a", True, [0, 0, 0]) is first  # Any color sequence hits
+    cache.render(font, "c", True, (0, 0, 0))  # Evicts "b", the least recently used
+    assert len(cache.surfaces) == 2
+    assert cache.render(font, "a", True, (0, 0, 0)) is first
+    cache.render(font, "b", True, (0, 0, 0))
+    assert font.renders == ["a", "b", "c", "b"]
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.hit_rate() == 2 / 6
+
+
+def test_text_cache_keys_on_every_argument():
+    font, other = CountingFont(), CountingFont()
+    cache = TextCache()
+    cache.render(font, "a", True, (0, 0, 0))
+    cache.render(font, "a", False, (0, 0, 0))
+    cache.render(font, "a", True, (1, 0, 0))
+    cache.render(other, "a", True, (0, 0, 0))
+    assert (cache.hits, cache.misses) == (0, 4)
+    cache.clear()
+    assert (cache.hits, cache.misses, len(cache.surfaces), cache.hit_rate()) == (0, 0, 0, 0.0)
+
+
+def test_frame_profiler_histogram_and_percentiles(tmp_path, monkeypatch):
+    import GuessHighLow_render
+    from GuessHighLow_render import FrameProfiler
+
+    now = [0.0]
+    monkeypatch.setattr(GuessHighLow_render.time, "perf_counter", lambda: now[0])
+
+    def section(profiler, name, ms):
+        with profiler.measure(name):
+            now[0] += ms / 1000
+
+    profiler = FrameProfiler(window=100)
+    for frame in range(100):
+        section(profiler, "update", 1.0)
+        section(profiler, "draw", frame * 0.1 + 0.05)  # Frames of 1.05 .. 10.95 ms
+        profiler.end_frame()
+    section(profiler, "draw", 500)
+    profiler.end_frame()  # Lands in the last bucket, pushes the 1.05 ms frame out of the window
+
+    assert profiler.frames == 101
+    assert sum(profiler.histogram) == 101
+    assert profiler.histogram[-1] == 1
+    assert profiler.histogram[2] == 5  # 1.05 .. 1.45 ms
+    assert profiler.percentile(0.0) == pytest.approx(1.15)
+    assert profiler.percentile(0.95) == pytest.approx(10.65)
+    assert profiler.percentile(1.0) == pytest.approx(500)
+
+    path = tmp_path / "frames.csv"
+    profiler.write_histogram(path)
+    lines = path.read_text().splitlines()
+    assert lines[:2] == ["bucket_start_ms,bucket_end_ms,frames", "1.0,1.5,5"]
+    assert "99.5,,1" in lines
+    assert f"update,{100 / 101:.4f}" in lines
@@ -0,0 +1,116 @@
+"""Replay logs: byte round trips and rebuilding recorded games"""
+import random
+import sys
+
+import pytest
+
+from GuessHighLow_bots import BOTS
+from GuessHighLow_engine import GameEngine, InstantClock, ManualClock
+from GuessHighLow_replay import STEPS, ReplayLog, ReplayRecorder, main, read_logs, replay
+
+
+def click_through(engine, rnd, clicks):
+    """Random clicks on the active buttons, with time passing in between"""
+    for _ in range(clicks):
+        buttons = sorted(engine.active_buttons() - {"exit", "start_new"})
+        if buttons and rnd.random() < 0.7:
+            engine.handle_button_click(rnd.choice(buttons))
+        else:
+            engine.step(rnd.choice((200, 1100, 2100)))
+
+
+def test_recorded_games_replay():
+    rnd = random.Random(7)
+    engine = GameEngine(seed=7, clock=ManualClock())
+    engine.recorder = ReplayRecorder()
+    for _ in range(20):
+        engine.handle_button_click("start_new")
+        while engine.game_state != "game_over":
+            click_through(engine, rnd, 50)
+    engine.recorder.finish(engine)
+
+    assert len(engine.recorder.logs) == 20
+    assert any(step == "shuffle" for log in engine.recorder.logs for _, step in log.steps)
+    for log in engine.recorder.logs:
+        data = log.to_bytes()
+        copy, end = ReplayLog.from_bytes(data)
+        assert end == len(data)
+        assert (copy.seed, copy.steps, copy.final_score, copy.decks) == (log.seed, log.steps, log.final_score, log.decks)
+        assert replay(copy).player_score == log.final_score
+
+
+def test_bot_games_replay_from_file(tmp_path):
+    path = tmp_path / "games.ghlr"
+    engine = GameEngine(seed=8, clock=InstantClock(), decks=2)
+    engine.bot = BOTS["bonus_hunting"](engine.rng)
+    engine.recorder = ReplayRecorder(str(path))
+    scores = []
+    for _ in range(5):
+        engine.handle_button_click("start_new")
+        engine.update()
+        scores.append(engine.player_score)
+    engine.recorder.finish(engine)
+
+    logs = list(read_logs(str(path)))
+    assert [log.final_score for log in logs] == scores
+    assert [replay(log).player_score for log in logs] == scores
+
+
+def test_wide_seeds_and_old_headers_round_trip():
+    log = ReplayLog(2 ** 256 - 1, [(1001, "reveal"), (1500, "higher")], 10, decks=3)
+    copy, _ = ReplayLog.from_bytes(log.to_bytes())
+    assert (copy.seed, copy.decks, copy.version) == (log.seed, 3, 4)
+
+    old = ReplayLog(2 ** 64 - 1, log.steps, 10, version=3)
+    data = old.to_bytes()
+    assert len(data) == len(log.to_bytes()) - 24
+    assert ReplayLog.from_bytes(data)[0].to_bytes() == data
+
+
+def test_bad_logs_raise_value_error():
+    data = ReplayLog(5, [(1001, "reveal"), (1500, "higher"), (2600, "result")], 10).to_bytes()
+    for end in range(len(data)):
+        with pytest.raises(ValueError):
+            ReplayLog.from_bytes(data[:end])
+    unknown = bytearray(data)
+    unknown[unknown.index(STEPS.index("higher"), len(data) - 8)] = len(STEPS)
+    for bad in (bytes(unknown), b"GHLX" + data[4:], data[:4] + b"\x09" + data[5:]):
+        with pytest.raises(ValueError):
+            ReplayLog.from_bytes(bad)
+
+
+def test_main_reports_bad_files_and_carries_on(tmp_path, monkeypatch, capsys):
+    good = ReplayLog(5, [(1001, "reveal"), (1500, "higher")], 0)
+    engine = replay(good)
+    good.final_score = engine.player_score
+    data = good.to_bytes()
+    paths = [tmp_path / "truncated.ghlr", tmp_path / "good.ghlr"]
+    paths[0].write_bytes(data + data[:-3])
+    paths[1].write_bytes(data * 2)
+
+    monkeypatch.setattr(sys, "argv", ["replay"] + [str(path) for path in paths])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert f"{paths[0]}#1: Truncated replay log" in out
+    assert "3 games replayed" in out
+    assert "0 mismatches, 1 unreadable files" in out
+
+
+def test_legacy_logs_keep_old_dispatch():
+    # Before version 3 a guess clicked behind an open hint dialog still counted
+    engine = GameEngine(seed=9, clock=ManualClock())
+    engine.start_new_game(9)
+    engine.reveal_computer_card()
+    guess = max(("higher", "lower", "tie"), key=engine.calculate_probabilities().get)
+    steps = [(1001, "reveal"), (1500, "hint"), (1600, guess)]
+
+    old = replay(ReplayLog(9, steps, version=2))
+    new = replay(ReplayLog(9, steps))
+    assert old.game_state == "revealing"
+    assert old.show_hint_dialog
+    assert new.game_state == "waiting_guess"
+
+    data = ReplayLog(9, steps, version=2).to_bytes()
+    assert ReplayLog.from_bytes(data)[0].version == 2
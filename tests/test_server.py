@@ -0,0 +1,133 @@
+"""Multi-session server: protocol, timers and idle eviction"""
+import asyncio
+import base64
+import json
+
+from GuessHighLow_engine import ManualClock, ScaledClock
+from GuessHighLow_server import GameServer, Session
+
+
+class FakeTransport:
+    """Collects what a session writes"""
+
+    def __init__(self):
+        self.messages = []
+        self.closed = False
+
+    def write(self, data):
+        self.messages.extend(json.loads(line) for line in data.splitlines())
+
+    def close(self):
+        self.closed = True
+
+
+async def connect(server):
+    listener = await server.start("127.0.0.1", 0)
+    host, port = listener.sockets[0].getsockname()[:2]
+    return listener, host, port
+
+
+async def open_client(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(message):
+        writer.write(json.dumps(message).encode() + b"\n")
+        return await receive()
+
+    async def receive():
+        return json.loads(await asyncio.wait_for(reader.readline(), 5))
+
+    return reader, writer, request, receive
+
+
+def test_protocol_round_trip():
+    async def run():
+        server = GameServer(seed=1, snapshot_key=b"key")
+        listener, host, port = await connect(server)
+        reader, writer, request, receive = await open_client(host, port)
+        await request({"action": "state"})
+        session, = server.sessions.values()
+        session.engine.clock = ScaledClock(50)  # 20 ms reveal, 40 ms result banner
+
+        state = await request({"action": "start_new"})
+        assert (state["event"], state["state"], state["cards_left"]) == ("start_new", "dealing", 52)
+        assert state["computer"] is None and state["player"] is None
+        state = await receive()  # Pushed by the reveal timer
+        assert (state["event"], state["state"]) == ("reveal", "waiting_guess")
+        assert state["computer"] is not None and state["player"] is None
+
+        hint = (await request({"action": "hint"}))["hint"]
+        assert hint["remaining"] == 53
+        assert (await request({"action": "higher"}))["state"] == "waiting_guess"  # Behind the dialog
+        await request({"action": "hint_ok"})
+        guess = max(("higher", "lower", "tie"), key=hint.get)
+        state = await request({"action": guess})
+        assert state["state"] == "revealing" and state["player"] is not None
+        assert state["score"] == state["result"]["score_added"]
+        state = await receive()
+        assert (state["event"], state["state"], state["cards_left"]) == ("result", "dealing", 50)
+
+        assert "error" in await request({"no": "action"})
+        assert "error" in await request({"action": "fly"})
+        saved = await request({"action": "snapshot"})
+        forged = bytearray(base64.b64decode(saved["snapshot"]))
+        forged[9] ^= 1
+
+        other_reader, other_writer, other_request, _ = await open_client(host, port)
+        bad = await other_request({"action": "restore", "snapshot": base64.b64encode(bytes(forged)).decode()})
+        assert bad["error"] == "invalid snapshot"
+        restored = await other_request({"action": "restore", "snapshot": saved["snapshot"]})
+        current = await request({"action": "state"})
+        del restored["event"], current["event"]
+        assert restored == current
+
+        writer.write(b'{"action": "exit"}\n')
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        other_writer.close()
+        listener.close()
+    asyncio.run(run())
+
+
+def test_idle_sessions_are_evicted():
+    async def run():
+        server = GameServer(idle_timeout=0.2, seed=2)
+        listener, host, port = await connect(server)
+        idle_reader, idle_writer, _, _ = await open_client(host, port)
+        _, writer, request, _ = await open_client(host, port)
+        for _ in range(12):  # The eviction sweep runs every second
+            await request({"action": "state"})
+            await asyncio.sleep(0.1)
+        assert await asyncio.wait_for(idle_reader.read(), 5) == b""
+        assert server.evicted == 1
+        assert len(server.sessions) == 1
+        idle_writer.close()
+        writer.close()
+        listener.close()
+    asyncio.run(run())
+
+
+def test_timers_follow_pending_transitions():
+    async def run():
+        server = GameServer(seed=3)
+        session = Session(server)
+        session.connection_made(FakeTransport())
+        session.engine.clock = ManualClock()  # Real delays of 0 ms: timers fire on the next loop pass
+        messages = session.transport.messages
+
+        session.data_received(b'{"action": "start_new"}\n')
+        assert session.armed == ("reveal", 1000)
+        timer = session.timer
+        server.arm_timer(session)
+        assert session.timer is timer  # Same transition: not re-armed
+
+        await asyncio.sleep(0.01)
+        assert [message["event"] for message in messages] == ["start_new", "reveal"]
+        assert session.armed is None and session.timer is None
+
+        session.data_received(b'{"action": "lower"}\n')
+        assert session.armed == ("result", 2000)
+        session.data_received(b'{"action": "exit"}\n')
+        assert session.transport.closed
+        session.connection_lost(None)
+        assert session.timer is None and not server.sessions
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+"""Vectorized simulation against games played on the engine"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from GuessHighLow_bots import BOTS
+from GuessHighLow_engine import GameEngine
+from GuessHighLow_sim import deck_values, simulate_chunk, simulate_games
+from GuessHighLow_tournament import play_game
+
+
+class EngineDecks:
+    """Stands in for the sim's GameRng: deals the engine's shuffled decks"""
+
+    def __init__(self, decks, seeds):
+        engine = GameEngine(decks=decks)
+        rows = []
+        for seed in seeds:
+            engine.start_new_game(seed)
+            rows.append([engine.card_values[card] for card in engine.card_deck])
+        self.rows = np.array(rows, dtype=np.int8)
+
+    def shuffled(self, values, count):
+        assert count == len(self.rows)
+        return self.rows
+
+
+@pytest.mark.parametrize("decks", [1, 3])
+@pytest.mark.parametrize("strategy", ["most_likely", "best_points", "bonus_hunting"])
+def test_sim_scores_match_engine(strategy, decks):
+    seeds = range(300)
+    engine = GameEngine(decks=decks)
+    bot = BOTS[strategy]()
+    expected = [play_game(engine, bot, seed) for seed in seeds]
+
+    scores, hits, bonuses = simulate_chunk(deck_values(decks), len(seeds), bot, EngineDecks(decks, seeds))
+    assert scores.tolist() == expected
+    assert hits.sum() >= bonuses.sum()
+
+
+def test_sim_mean_matches_tournament():
+    engine = GameEngine(seed=1)
+    bot = BOTS["most_likely"]()
+    engine_scores = np.array([play_game(engine, bot) for _ in range(2000)])
+    sim_scores = simulate_games(20_000, "most_likely", seed=2).scores
+    se = np.hypot(engine_scores.std() / np.sqrt(len(engine_scores)), sim_scores.std() / np.sqrt(len(sim_scores)))
+    assert abs(engine_scores.mean() - sim_scores.mean()) < 4 * se
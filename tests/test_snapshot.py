@@ -0,0 +1,136 @@
+"""Snapshots: round trips, continuation after restore, rejected blobs"""
+import random
+
+import pytest
+
+from GuessHighLow_engine import GameEngine, ManualClock
+from GuessHighLow_snapshot import HEADER, SIGNATURE_SIZE, STATE_CODES, restore, signed, snapshot, verified
+from test_replay import click_through
+
+
+def state(engine):
+    return (engine.game_state, engine.player_score, engine.bonus_count, engine.computer_card,
+            engine.player_card, engine.remaining_cards(), engine.show_hint_dialog,
+            engine.show_shuffle_dialog, engine.show_result, engine.show_instruction_dialog)
+
+
+@pytest.mark.parametrize("decks", [1, 2, 100])
+def test_restored_game_continues_identically(decks):
+    rnd = random.Random(decks)
+    for trial in range(30 if decks < 100 else 3):
+        engine = GameEngine(seed=trial, clock=ManualClock(), decks=decks)
+        engine.start_new_game()
+        click_through(engine, rnd, rnd.randrange(80))
+
+        data = snapshot(engine)
+        copy = restore(data, GameEngine(clock=ManualClock(engine.now())))
+        assert snapshot(copy) == data
+        assert state(copy) == state(engine)
+
+        # Same clicks and waits from here on, including more shuffles
+        script = random.Random(trial).getstate()
+        for game in (engine, copy):
+            rnd.setstate(script)
+            click_through(game, rnd, 300)
+        assert state(copy) == state(engine)
+
+
+def test_large_shoe_restores_stream_state():
+    engine = GameEngine(seed=1, clock=ManualClock(), decks=100)
+    engine.start_new_game()
+    for _ in range(2):
+        engine.shuffle_deck()
+    assert engine.shuffle_history is None
+    copy = restore(snapshot(engine))
+    assert copy.shuffle_history is None
+    engine.shuffle_deck()
+    copy.shuffle_deck()
+    assert copy.remaining_cards() == engine.remaining_cards()
+
+
+def test_bad_snapshots_are_rejected():
+    engine = GameEngine(seed=2, clock=ManualClock())
+    engine.start_new_game()
+    engine.reveal_computer_card()
+    data = snapshot(engine)
+
+    target = GameEngine(seed=3, clock=ManualClock())
+    target.start_new_game()
+    before = snapshot(target)
+    deck_start = data.index(engine.card_deck.tobytes())
+    duplicate = bytearray(data)
+    duplicate[deck_start + 1] = duplicate[deck_start]
+    unknown_state = bytearray(data)
+    unknown_state[HEADER.size - 2] = 9
+    for bad in (data[:-1], data + b"\0", data[:HEADER.size], bytes(duplicate), bytes(unknown_state)):
+        with pytest.raises(ValueError):
+            restore(bad, target)
+    assert snapshot(target) == before
+
+    for seed in range(20):
+        rnd = random.Random(seed)
+        for _ in range(300):
+            mutated = bytearray(data)
+            mutated[rnd.randrange(len(mutated))] = rnd.randrange(256)
+            try:
+                game = restore(bytes(mutated))
+            except ValueError:
+                continue
+            play_to_end(game)
+
+
+def play_to_end(game):
+    """Play a restored game to game over, failing if it stops moving on"""
+    for _ in range(2 * len(game.card_deck) + 3):  # Three steps per two cards, after a possible new game
+        if game.game_state == "game_over":
+            return
+        if game.game_state == "idle":
+            game.start_new_game()
+        elif game.game_state == "dealing":
+            game.reveal_computer_card()
+        elif game.game_state == "waiting_guess":
+            game.make_guess("higher")
+        else:
+            game.finish_round()
+    pytest.fail(f"Restored game stuck in state {game.game_state}")
+
+
+def test_face_up_cards_must_match_the_state():
+    engine = GameEngine(seed=6, clock=ManualClock())
+    engine.start_new_game()
+    engine.reveal_computer_card()
+    data = snapshot(engine)
+    state_offset = HEADER.size - 2
+    for state in ("idle", "dealing", "revealing", "game_over"):
+        recoded = bytearray(data)
+        recoded[state_offset] = STATE_CODES[state]
+        with pytest.raises(ValueError):
+            restore(bytes(recoded))
+
+    # The computer card of a finished round turned face down again
+    engine.make_guess("higher")
+    engine.finish_round()
+    data = bytearray(snapshot(engine))
+    deck_end = data.index(engine.card_deck.tobytes()) + len(engine.card_deck)
+    assert data[deck_end] == 0b0011
+    data[deck_end] = 0b0010
+    with pytest.raises(ValueError):
+        restore(bytes(data))
+
+    while engine.game_state != "game_over":
+        engine.reveal_computer_card()
+        engine.make_guess("lower")
+        engine.finish_round()
+    play_to_end(restore(snapshot(engine)))
+
+
+def test_signed_snapshots():
+    data = snapshot(GameEngine(seed=5))
+    blob = signed(data, b"key")
+    assert len(blob) == len(data) + SIGNATURE_SIZE
+    assert verified(blob, b"key") == data
+    forged = bytearray(blob)
+    forged[10] ^= 1
+    for bad, key in ((blob, b"other"), (bytes(forged), b"key"), (data, b"key"), (b"", b"key")):
+        with pytest.raises(ValueError):
+            verified(bad, key)
@@ -0,0 +1,69 @@
+"""Exact expected scores against Monte Carlo play of the engine"""
+import math
+import random
+
+from GuessHighLow_bots import BOTS
+from GuessHighLow_engine import DECK_VALUE_COUNTS, GUESSES, GameEngine, ManualClock
+from GuessHighLow_snapshot import restore, snapshot
+from GuessHighLow_solver import guess_values, optimal_guess, remaining_game_points
+
+
+def mid_game(seed, cards_left):
+    """Engine waiting for a guess with cards_left cards still in the deck"""
+    engine = GameEngine(seed=seed, clock=ManualClock())
+    engine.start_new_game()
+    while engine.cards_left() > cards_left:
+        engine.reveal_computer_card()
+        engine.make_guess("higher")
+        engine.finish_round()
+    engine.reveal_computer_card()
+    return engine
+
+
+def play_out(data, guess, rnd, bot):
+    """Points scored from a snapshot on with guess now, then bot play, the unrevealed cards redealt"""
+    engine = restore(data, GameEngine(clock=ManualClock()))
+    start = engine.player_score
+    unrevealed = engine.card_deck[engine.deck_cursor - 1:].tolist()
+    rnd.shuffle(unrevealed)
+    engine.card_deck[engine.deck_cursor - 1:] = type(engine.card_deck)(engine.card_deck.typecode, unrevealed)
+    engine.player_card = unrevealed[0]
+    engine.recount_values()
+    engine.make_guess(guess)
+    engine.finish_round()
+    while engine.game_state != "game_over":
+        engine.reveal_computer_card()
+        engine.make_guess(bot.decide(engine.table_view()))
+        engine.finish_round()
+    return engine.player_score - start
+
+
+def test_expected_scores_match_monte_carlo():
+    rnd = random.Random(1)
+    bot = BOTS["best_points"]()
+    trials = 3000
+    for seed, cards_left in ((1, 8), (2, 14), (3, 20)):
+        engine = mid_game(seed, cards_left)
+        values = guess_values(engine)
+        data = snapshot(engine)
+        for guess in GUESSES:
+            points = [play_out(data, guess, rnd, bot) for _ in range(trials)]
+            mean = sum(points) / trials
+            variance = sum((p - mean) ** 2 for p in points) / (trials - 1)
+            assert abs(mean - values[guess]) < 4 * math.sqrt(variance / trials) + 1e-9, (seed, guess)
+
+
+def test_full_game_expectation_matches_played_games():
+    expected = remaining_game_points(DECK_VALUE_COUNTS)
+    engine = GameEngine(seed=4, clock=ManualClock())
+    scores = []
+    for _ in range(3000):
+        engine.start_new_game()
+        while engine.game_state != "game_over":
+            engine.reveal_computer_card()
+            engine.make_guess(optimal_guess(engine))
+            engine.finish_round()
+        scores.append(engine.player_score)
+    mean = sum(scores) / len(scores)
+    variance = sum((s - mean) ** 2 for s in scores) / (len(scores) - 1)
+    assert abs(mean - expected) < 4 * math.sqrt(variance / len(scores))